@@ -82,11 +82,15 @@ setup(
     extras_require={
           'tests': tests_requires,
           'dev': dev_requires,
+          # Persistent stores, see icc.mothurpim.store
+          'berkeleydb': ['berkeleydb'],
+          'oxigraph': ['oxrdflib'],
+          'sqlalchemy': ['rdflib-sqlalchemy'],
     },
     test_suite='tests',
     entry_points={
         'console_scripts':
-            ['icc.mothurpim=iccmothurpim:main']
+            ['icc.mothurpim=icc.mothurpim.cli:main']
     },
     #ext_modules = cythonize(ext_modules),
     #test_suite = 'nose.collector',
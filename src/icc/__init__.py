@@ -1 +1,3 @@
-__import__('pkg_resources').declare_namespace(__name__)
+# A namespace package shared with icc.ngs, declared without
+# pkg_resources, which is slow to import.
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
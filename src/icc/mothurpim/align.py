@@ -0,0 +1,163 @@
+from rdflib import RDF, Literal, Namespace
+from rdflib.namespace import DC, OWL
+from icc.ngs.namespace import NGSP
+from collections import defaultdict
+import re
+import sys
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+# Alignment of the mothur commands of the specification made by
+# loader.Loader with the Galaxy tools of the suite made by suite.main.
+# Both graphs are indexed in one pass, the commands and parameters
+# are then matched by their (normalized) names in hash tables.
+
+# As in suite, not imported from there not to require hglib
+GAL = Namespace("http://galaxyproject.org/ontologies/shed/")
+
+RE_PARAM_SUFFIX = re.compile(r"_(?:in|input|file|data)$")
+RE_NOT_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(name):
+    """The parameter name without case, separators and the
+    suffixes Galaxy tools add to file parameters.
+    """
+    return RE_NOT_ALNUM.sub("", RE_PARAM_SUFFIX.sub("", name.lower()))
+
+
+def index(graph):
+    """Groups the (p, o) pairs of `graph` by subject."""
+    about = defaultdict(list)
+    for s, p, o in graph:
+        about[s].append((p, o))
+    return about
+
+
+def title(about, node):
+    for p, o in about.get(node, ()):
+        if p == DC.title:
+            return str(o)
+    return None
+
+
+def mothur_commands(spec):
+    """Returns a dictionary mapping the command names of the
+    specification to (module, {parameter name: node}).
+    """
+    about = index(spec)
+    commands = {}
+    for s, pos in about.items():
+        if (RDF.type, NGSP.Module) not in pos:
+            continue
+        params = {}
+        for p, o in pos:
+            if p == NGSP.parameter:
+                name = title(about, o)
+                if name is not None:
+                    params[name] = o
+        name = title(about, s)
+        if name is not None:
+            commands[name] = (s, params)
+    return commands
+
+
+def galaxy_tools(suite):
+    """Returns a dictionary mapping the tool names of the suite
+    to (module, {param name: node}), the params are collected
+    from the whole tool tree (inputs, conditionals, sections).
+    """
+    about = index(suite)
+    tools = {}
+    for s, pos in about.items():
+        if (RDF.type, GAL.Module) not in pos:
+            continue
+        params = {}
+        stack = [s]
+        while stack:
+            for p, o in about.get(stack.pop(), ()):
+                if isinstance(o, Literal):
+                    continue
+                if p == GAL.param:
+                    name = title(about, o)
+                    if name is not None:
+                        params.setdefault(name, o)
+                stack.append(o)
+        name = title(about, s)
+        if name is not None:
+            tools[name] = (s, params)
+    return tools
+
+
+class Alignment:
+    """The matched commands and parameters as (mothur, galaxy)
+    node pairs in `links`. `missing_tools` are the commands having
+    no Galaxy tool, `missing_commands` the tools having no mothur
+    command, `params` maps a matched command to the lists of its
+    unmatched mothur and Galaxy parameters.
+    """
+
+    def __init__(self):
+        self.links = []
+        self.commands = 0
+        self.missing_tools = []
+        self.missing_commands = []
+        self.params = {}
+
+    def triples(self):
+        for m, g in self.links:
+            yield m, OWL.sameAs, g
+
+    def report(self, out=None):
+        if out is None:
+            out = sys.stdout
+        out.write("# Aligned {} commands, {} links\n".format(
+            self.commands, len(self.links)))
+        for name in self.missing_tools:
+            out.write("No Galaxy tool: {}\n".format(name))
+        for name in self.missing_commands:
+            out.write("No mothur command: {}\n".format(name))
+        for name, (mothur, galaxy) in sorted(self.params.items()):
+            if mothur:
+                out.write("{}: mothur only: {}\n".format(
+                    name, ", ".join(mothur)))
+            if galaxy:
+                out.write("{}: Galaxy only: {}\n".format(
+                    name, ", ".join(galaxy)))
+
+
+def align(spec, suite, g=None):
+    """Aligns the mothur `spec` graph with the Galaxy `suite`
+    graph, adds the owl:sameAs links to `g`, if it is given,
+    and returns the Alignment.
+    """
+    commands = mothur_commands(spec)
+    tools = galaxy_tools(suite)
+    a = Alignment()
+    for name in sorted(commands):
+        m, mparams = commands[name]
+        if name not in tools:
+            a.missing_tools.append(name)
+            continue
+        t, tparams = tools[name]
+        a.commands += 1
+        a.links.append((m, t))
+        byname = {}
+        for pname, node in tparams.items():
+            byname.setdefault(normalize(pname), (pname, node))
+        matched = set()
+        unmatched = []
+        for pname, node in sorted(mparams.items()):
+            found = byname.get(normalize(pname))
+            if found is None:
+                unmatched.append(pname)
+            else:
+                a.links.append((node, found[1]))
+                matched.add(found[0])
+        galaxy = sorted(p for p in tparams if p not in matched)
+        if unmatched or galaxy:
+            a.params[name] = (unmatched, galaxy)
+    a.missing_commands = sorted(n for n in tools if n not in commands)
+    if g is not None:
+        g.addN((s, p, o, g) for s, p, o in a.triples())
+    return a
@@ -0,0 +1,525 @@
+"""Benchmarks of the extraction stages. Run as
+
+    python -m icc.mothurpim.bench <mothur-src/source/commands> [<hg root>]
+
+where <hg root> is a directory of the cloned suite sheds, or as
+
+    python -m icc.mothurpim.bench --synthetic N [--save results.json]
+                                  [--compare old.json]
+
+to time the pipeline stages on a generated corpus of N commands
+and sheds, saving the results and comparing them with saved ones.
+"""
+from icc.mothurpim.loader import (index_sources, CommandLoader,
+                                  RegexCommandLoader, CTX, compar_args)
+from icc.mothurpim.lexer import command_parts, parse_arguments, strip_comments
+import contextlib
+import tempfile
+import platform
+import argparse
+import random
+import json
+import time
+import sys
+import os
+
+
+def timeit(func, repeat=3):
+    """Returns the best time of `repeat` runs of `func` in
+    seconds, the output of `func` is discarded.
+    """
+    best = None
+    with open(os.devnull, "w") as null:
+        with contextlib.redirect_stdout(null):
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                t = time.perf_counter() - start
+                if best is None or t < best:
+                    best = t
+    return best
+
+
+def pairs(sourcedir):
+    index, unmatched = index_sources(sourcedir)
+    return [index[stem] for stem in sorted(index)]
+
+
+def bench_extractors(sourcedir, repeat=3):
+    """Compares the regular expression and lexer based
+    extractors on all the commands of `sourcedir`.
+    """
+    ps = pairs(sourcedir)
+    results = {}
+    for cls in (RegexCommandLoader, CommandLoader):
+        def run():
+            for cpp, header in ps:
+                cls(None, cpp, header).extract()
+        results[cls.__name__] = timeit(run, repeat)
+    report("Extraction of {} commands".format(len(ps)), results)
+    return results
+
+
+def bench_params(sourcedir, repeat=3):
+    """Compares eval with the CommandParameter argument
+    parser on all the parameters of `sourcedir`.
+    """
+    defs = []
+    for cpp, header in pairs(sourcedir):
+        with open(cpp) as i:
+            params, helps, gop = command_parts(i.read())
+        defs.extend(d for pname, d, start in params)
+
+    def evaluate():
+        for d in defs:
+            eval("compar("+d+")", CTX)
+
+    def parse():
+        for d in defs:
+            compar_args(*parse_arguments(d))
+
+    results = {"eval": timeit(evaluate, repeat),
+               "parse_arguments": timeit(parse, repeat)}
+    report("Arguments of {} parameters".format(len(defs)), results)
+    return results
+
+
+def shed_strings(hgroot):
+    """Returns a list of (macros.xml, strings) pairs of the shed
+    checkouts in `hgroot`, the strings are the attribute values
+    and texts of the tool XMLs as process_shed expands them.
+    """
+    from lxml import etree
+    sheds = []
+    for entry in sorted(os.scandir(hgroot), key=lambda e: e.name):
+        macros = os.path.join(entry.path, "macros.xml")
+        if not entry.is_dir() or not os.path.exists(macros):
+            continue
+        strings = []
+        for tool in os.scandir(entry.path):
+            if not tool.name.endswith(".xml") or tool.path == macros:
+                continue
+            for el in etree.parse(tool.path).iter():
+                strings.extend(el.attrib.values())
+                if isinstance(el.text, str):
+                    strings.append(el.text.replace("\n", "").strip())
+        sheds.append((macros, strings))
+    return sheds
+
+
+def bench_expansion(hgroot, repeat=3):
+    """Compares the token expansion by str.replace loops with
+    the compiled Macros on all the sheds of `hgroot`.
+    """
+    from lxml import etree
+    from icc.mothurpim.suite import load_macros, parse_macros
+    sheds = shed_strings(hgroot)
+
+    def replace():
+        for macros, strings in sheds:
+            tk = {}
+            for t in etree.parse(macros).xpath("/macros/token"):
+                tk[t.attrib["name"]] = t
+            for t in strings:
+                if t:
+                    for k, v in tk.items():
+                        t = t.replace(k, v.text)
+
+    def compiled():
+        parse_macros.cache_clear()
+        for macros, strings in sheds:
+            expand = load_macros(macros).expand
+            for t in strings:
+                expand(t)
+
+    results = {"str.replace": timeit(replace, repeat),
+               "Macros.expand": timeit(compiled, repeat)}
+    report("Token expansion in {} sheds, {} strings".format(
+        len(sheds), sum(len(strings) for m, strings in sheds)), results)
+    return results
+
+
+def report(title, results):
+    print("# {}".format(title))
+    base = None
+    for name, t in results.items():
+        if base is None:
+            base = t
+        print("{:<24} {:10.4f}s {:8.2f}x".format(name, t, base / t))
+
+
+CMD_HEADER = """#ifndef {guard}
+#define {guard}
+
+/*
+ *  {cls}.h
+ *  Mothur
+ *
+ *  Generated for benchmarking.
+ */
+
+#include "command.hpp"
+
+class {cls} : public Command {{
+public:
+    {cls}(string);
+    ~{cls}(){{}}
+
+    vector<string> setParameters();
+    string getCommandName()        {{ return "{name}"; }}
+    string getCommandCategory()    {{ return "{category}"; }}
+    string getHelpString();
+    string getOutputPattern(string);
+    string getCitation() {{ return "http://www.mothur.org/wiki/{wiki}"; }}
+    string getDescription()        {{ return "{name} of the sequences"; }}
+
+    int execute();
+    void help() {{ m->mothurOut(getHelpString()); }}
+
+private:
+    bool abort;  // Set by the parameter checks
+    string fastafile, outputDir;
+    vector<string> outputNames;
+}};
+
+#endif
+"""
+
+CMD_PARAMETER = (
+    '        CommandParameter p{name}("{name}", "{type}", "{options}", '
+    '"{default}", "{only_one}", "none", "none","{outputs}",false,'
+    '{required},true); parameters.push_back(p{name});  // {name}\n')
+
+CMD_SOURCE = """/*
+ *  {cls}.cpp
+ *  Mothur
+ */
+
+#include "{header}"
+
+//**********************************************************************
+vector<string> {cls}::setParameters(){{
+    try {{
+{parameters}
+        vector<string> myArray;
+        for (int i = 0; i < parameters.size(); i++) {{
+            myArray.push_back(parameters[i].name);
+        }}
+        return myArray;
+    }}
+    catch(exception& e) {{
+        m->errorOut(e, "{cls}", "setParameters");
+        exit(1);
+    }}
+}}
+//**********************************************************************
+string {cls}::getHelpString(){{
+    try {{
+        string helpString = "";
+        helpString += "The {name} command reads a fasta file.\\n";
+        helpString += "The {name} command parameters are fasta and name.\\n";
+        /* helpString += "Not in the help.\\n"; */
+        helpString += "Example {name}(fasta=abrecovery.fasta).\\n";
+        return helpString;
+    }}
+    catch(exception& e) {{
+        m->errorOut(e, "{cls}", "getHelpString");
+        exit(1);
+    }}
+}}
+//**********************************************************************
+string {cls}::getOutputPattern(string type) {{
+    try {{
+        string pattern = "";
+{patterns}        else {{ m->mothurOut("[ERROR]: No definition for type " + type + " output pattern.\\n"); m->setControl_pressed(true);  }}
+        return pattern;
+    }}
+    catch(exception& e) {{
+        m->errorOut(e, "{cls}", "getOutputPattern");
+        exit(1);
+    }}
+}}
+//**********************************************************************
+int {cls}::execute(){{
+    try {{
+        if (abort) {{ if (calledHelp) {{ return 0; }}  return 2;	}}
+        // Some code, which is not parsed
+        for (int i = 0; i < outputNames.size(); i++) {{
+            m->mothurOut(outputNames[i] + "\\n");  // "{{" in strings
+        }}
+        return 0;
+    }}
+    catch(exception& e) {{
+        m->errorOut(e, "{cls}", "execute");
+        exit(1);
+    }}
+}}
+"""
+
+CMD_PATTERN = """        {kw}if (type == "{type}") {{  pattern = "[filename],{type}"; }}
+"""
+
+SHED_TOOL = """<tool profile="16.07" id="mothur_{cname}" name="{name}" version="@WRAPPER_VERSION@.0">
+    <description>{name} of the sequences</description>
+    <macros>
+        <import>macros.xml</import>
+    </macros>
+    <expand macro="requirements"/>
+    <expand macro="stdio"/>
+    <command><![CDATA[
+@SHELL_OPTIONS@
+echo '{name}(fasta=fasta.dat)' | mothur
+    ]]></command>
+    <inputs>
+{params}    </inputs>
+    <outputs>
+        <data name="logfile" format="txt" from_work_dir="mothur.*.logfile" label="${{tool.name}} on ${{on_string}}: logfile"/>
+        <data name="out" format="fasta" from_work_dir="fasta*.fasta" label="${{tool.name}} on ${{on_string}}: @TOKEN1@"/>
+    </outputs>
+    <tests>
+        <test>
+            <param name="fasta" value="test.fasta"/>
+        </test>
+    </tests>
+    <help><![CDATA[
+@MOTHUR_OVERVIEW@
+
+The {name} command, see @TOKEN2@.
+    ]]></help>
+</tool>
+"""
+
+SHED_PARAM = """        <param name="p{i}" type="{type}" value="{value}" label="p{i} - @TOKEN{t}@" help="see @TOKEN{t2}@"/>
+"""
+
+SHED_MACROS = """<macros>
+    <token name="@WRAPPER_VERSION@">1.39.5</token>
+    <token name="@SHELL_OPTIONS@">set -o pipefail;</token>
+    <token name="@MOTHUR_OVERVIEW@">**Mothur Overview** @TOKEN0@</token>
+{tokens}    <xml name="requirements">
+        <requirements>
+            <requirement type="package" version="@WRAPPER_VERSION@">mothur</requirement>
+        </requirements>
+    </xml>
+    <xml name="stdio">
+        <stdio>
+            <exit_code range="1:" level="fatal"/>
+        </stdio>
+    </xml>
+</macros>
+"""
+
+TYPES = ["InputTypes", "Number", "Boolean", "String", "Multiple"]
+CATEGORIES = ["Sequence Processing", "OTU-Based Approaches",
+              "Hypothesis Testing", "Phylotype Analysis"]
+
+
+def command_name(i):
+    return "cmd{}.seqs".format(i)
+
+
+def generate_commands(directory, count, params=12, seed=0):
+    """Writes `count` mothur-like command header and source pairs
+    with `params` parameters each to `directory`.
+    """
+    rnd = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for i in range(count):
+        name = command_name(i)
+        cls = "Cmd{}SeqsCommand".format(i)
+        stem = "cmd{}seqscommand".format(i)
+        ps = []
+        for j in range(params):
+            t = TYPES[0] if j < 3 else rnd.choice(TYPES)
+            ps.append(CMD_PARAMETER.format(
+                name="p{}".format(j), type=t,
+                options="a-b-c" if t == "Multiple" else "",
+                default={"Multiple": "a", "Number": "1",
+                         "Boolean": "F"}.get(t, ""),
+                only_one="ab" if j in (1, 2) else "none",
+                outputs="fasta" if j == 0 else "",
+                required="true" if j == 0 else "false"))
+        types = ["fasta", "summary", "accnos"][:rnd.randint(1, 3)]
+        patterns = "".join(CMD_PATTERN.format(kw="else " if k else "", type=t)
+                           for k, t in enumerate(types))
+        with open(os.path.join(directory, stem+".h"), "w") as o:
+            o.write(CMD_HEADER.format(
+                guard=stem.upper()+"_H", cls=cls, name=name,
+                category=rnd.choice(CATEGORIES), wiki=name.capitalize()))
+        with open(os.path.join(directory, stem+".cpp"), "w") as o:
+            o.write(CMD_SOURCE.format(
+                cls=cls, header=stem+".h", name=name,
+                parameters="".join(ps), patterns=patterns))
+
+
+def generate_sheds(directory, count, params=12, tokens=20, seed=0):
+    """Writes `count` Galaxy shed checkouts, a tool XML and
+    macros.xml in each, to `directory` laid out as HGROOT.
+    Returns the list of their suite.Suite records.
+    """
+    from icc.mothurpim.suite import Suite
+    rnd = random.Random(seed)
+    sheds = []
+    for i in range(count):
+        name = command_name(i)
+        shed = "mothur_" + name.replace(".", "_")
+        path = os.path.join(directory, shed)
+        os.makedirs(path, exist_ok=True)
+        ps = "".join(SHED_PARAM.format(
+            i=j, type=rnd.choice(["data", "integer", "boolean", "text"]),
+            value=j, t=rnd.randrange(tokens), t2=rnd.randrange(tokens))
+                     for j in range(params))
+        with open(os.path.join(path, name+".xml"), "w") as o:
+            o.write(SHED_TOOL.format(name=name, cname=name.replace(".", "_"),
+                                     params=ps))
+        ts = "".join('    <token name="@TOKEN{}@">token {} of {}</token>\n'
+                     .format(j, j, name) for j in range(tokens))
+        with open(os.path.join(path, "macros.xml"), "w") as o:
+            o.write(SHED_MACROS.format(tokens=ts))
+        sheds.append(Suite(owner="iuc", name=shed,
+                           shed="toolshed.g2.bx.psu.edu", rev="0"))
+    return sheds
+
+
+def bench_stages(count, repeat=3, workdir=None):
+    """Generates a corpus of `count` commands and sheds and times
+    the pipeline stages on it. Returns a dictionary of the
+    results, the times are the best of `repeat` runs in seconds.
+    """
+    from icc.mothurpim.loader import Loader, extract
+    from icc.mothurpim.ntriples import NTriplesWriter
+    from icc.mothurpim import suite
+    with tempfile.TemporaryDirectory(dir=workdir) as d:
+        commands = os.path.join(d, "commands")
+        hgroot = os.path.join(d, "hg")
+        generate_commands(commands, count)
+        sheds = generate_sheds(hgroot, count)
+        ps = pairs(commands)
+        texts = []
+        for cpp, header in ps:
+            for name in (cpp, header):
+                with open(name) as i:
+                    texts.append(i.read())
+        loader = Loader(commands)
+        with open(os.devnull, "w") as null:
+            with contextlib.redirect_stdout(null):
+                records = [extract(cpp, header) for cpp, header in ps]
+
+        def build():
+            loader.graph.remove((None, None, None))
+            for record in records:
+                loader.add(record)
+
+        def regex():
+            for cpp, header in ps:
+                RegexCommandLoader(None, cpp, header).extract()
+
+        def lexer():
+            for cpp, header in ps:
+                CommandLoader(None, cpp, header).extract()
+
+        def serialize_nt():
+            with NTriplesWriter(os.devnull) as w:
+                w.addN((s, p, o, None) for s, p, o in loader.graph)
+
+        def convert():
+            hg = suite.HGROOT
+            suite.HGROOT = hgroot
+            try:
+                for index, shed, sg in suite.convert_sheds(enumerate(sheds)):
+                    pass
+            finally:
+                suite.HGROOT = hg
+
+        stages = [
+            ("discovery", lambda: index_sources(commands)),
+            ("strip_comments", lambda: [strip_comments(t) for t in texts]),
+            ("extract_regex", regex),
+            ("extract_lexer", lexer),
+            ("build_graph", build),
+            ("serialize_nt", serialize_nt),
+            ("serialize_turtle", lambda: loader.graph.serialize(
+                format="turtle")),
+            ("convert_sheds", convert),
+        ]
+        results = {}
+        for name, func in stages:
+            results[name] = timeit(func, repeat)
+            print("{:<24} {:10.4f}s".format(name, results[name]))
+        triples = len(loader.graph)
+    return {"commands": count,
+            "triples": triples,
+            "python": platform.python_version(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "stages": results}
+
+
+def compare(old, new, tolerance=0.1):
+    """Prints the stage times of `new` results relative to `old`
+    ones, returns the names of the stages slower by more than
+    `tolerance`.
+    """
+    print("# Compared with the results of {}".format(old.get("time")))
+    slower = []
+    for name, t in new["stages"].items():
+        before = old["stages"].get(name)
+        if before is None:
+            continue
+        mark = ""
+        if t > before * (1 + tolerance):
+            slower.append(name)
+            mark = "  REGRESSION"
+        print("{:<24} {:10.4f}s {:10.4f}s {:8.2f}x{}".format(
+            name, before, t, before / t, mark))
+    return slower
+
+
+def synthetic(args):
+    if args.commands < 1:
+        raise ValueError("the number of commands must be positive")
+    print("# Synthetic corpus of {} commands".format(args.commands))
+    results = bench_stages(args.commands, args.repeat)
+    if args.save:
+        with open(args.save, "w") as o:
+            json.dump(results, o, indent=2)
+    if args.compare:
+        with open(args.compare) as i:
+            old = json.load(i)
+        if old.get("commands") != results["commands"]:
+            print("WARNING: Compared results are of {} commands".format(
+                old.get("commands")))
+        if compare(old, results, args.tolerance):
+            return 2
+    return 0
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = argparse.ArgumentParser(
+        prog="python -m icc.mothurpim.bench",
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("sources", nargs="?", help="mothur commands directory")
+    parser.add_argument("hgroot", nargs="?", help="directory of the sheds")
+    parser.add_argument("--synthetic", type=int, dest="commands",
+                        help="number of generated commands and sheds")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="file to save the results to")
+    parser.add_argument("--compare", help="file of the results to compare")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="slowdown reported as a regression")
+    args = parser.parse_args(argv)
+    if args.commands is not None:
+        return synthetic(args)
+    if args.sources is None:
+        parser.print_help()
+        return 1
+    bench_extractors(args.sources)
+    bench_params(args.sources)
+    if args.hgroot is not None:
+        bench_expansion(args.hgroot)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
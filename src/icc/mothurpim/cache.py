@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import os.path
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+CACHEFILE = "records.json"
+
+
+class RecordCache:
+    """Persistent cache of extracted command records keyed
+    by the SHA-1 of the header and source contents.
+
+    The whole cache is dropped when `version` (the extractor
+    version) differs from the stored one. The warnings are
+    passed to `log`.
+    """
+
+    def __init__(self, directory, version, log=print):
+        self.directory = directory
+        self.version = version
+        self.log = log
+        self.filename = os.path.join(directory, CACHEFILE)
+        self.records = {}
+        self.hits = 0
+        self.misses = 0
+        self.changed = False
+        self.read()
+
+    def read(self):
+        try:
+            with open(self.filename) as i:
+                data = json.load(i)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            self.log("WARNING: Broken cache {}, dropped".format(self.filename))
+            self.changed = True
+            return
+        if data.get("version") != self.version:
+            self.log("# Extractor version changed, cache invalidated")
+            self.changed = True
+            return
+        self.records = data["records"]
+
+    def key(self, *names):
+        h = hashlib.sha1()
+        for name in names:
+            with open(name, "rb") as i:
+                h.update(i.read())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get(self, key):
+        record = self.records.get(key)
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    def put(self, key, record):
+        self.records[key] = record
+        self.changed = True
+
+    def prune(self, keys):
+        """Evicts the records whose keys are not in `keys`,
+        i.e. those of removed or changed source files.
+        """
+        keys = set(keys)
+        for key in list(self.records):
+            if key not in keys:
+                del self.records[key]
+                self.changed = True
+
+    def clear(self):
+        self.records = {}
+        self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.filename+".tmp"
+        with open(tmp, "w") as o:
+            json.dump({"version": self.version,
+                       "records": self.records}, o)
+        os.replace(tmp, self.filename)
+        self.changed = False
+
+
+def status(directory):
+    """Returns a dictionary of the extractor version, the number
+    of records and the size of the cache in `directory`, None if
+    there is no cache there.
+    """
+    filename = os.path.join(directory, CACHEFILE)
+    try:
+        size = os.path.getsize(filename)
+        with open(filename) as i:
+            data = json.load(i)
+    except FileNotFoundError:
+        return None
+    return {"version": data.get("version"),
+            "records": len(data.get("records", ())),
+            "bytes": size}
@@ -0,0 +1,294 @@
+"""The icc.mothurpim command line. Run as
+
+    icc.mothurpim extract <mothur-src/source/commands> -o spec.ttl
+    icc.mothurpim show summary.seqs --snapshot spec.snp
+    icc.mothurpim suite --stream
+
+or see icc.mothurpim <subcommand> --help.
+"""
+import argparse
+import os.path
+import sys
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+# Only argparse is imported here, the modules of a subcommand
+# (and rdflib, lxml, hglib with them) are imported when it runs,
+# so --help and the light subcommands start fast.
+
+
+def make_stats(args):
+    from icc.mothurpim.stats import Stats
+    return Stats(verbose=not args.quiet)
+
+
+def save_stats(args, stats):
+    if args.stats:
+        stats.save(args.stats)
+
+
+def cmd_extract(args):
+    from icc.mothurpim.loader import Loader
+    if args.stream:
+        if args.output is None:
+            raise ValueError("--stream needs an --output file")
+        if args.store is not None:
+            raise ValueError("--stream cannot write to a --store")
+    elif args.nquads:
+        raise ValueError("--nquads needs --stream")
+    stats = make_stats(args)
+    graph = None
+    if args.store is not None:
+        from icc.mothurpim.store import open_store, STORE
+        graph = open_store(args.store, args.backend or STORE, clear=True)
+    try:
+        loader = Loader(args.sources, workers=args.workers,
+                        cache=args.cache, recursive=args.recursive,
+                        graph=graph, stats=stats)
+        if args.stream:
+            identifier = None
+            if args.nquads:
+                from icc.mothurpim.store import SPEC_GRAPH
+                identifier = SPEC_GRAPH
+            count = loader.stream(args.output, identifier)
+        else:
+            loader.load()
+            count = len(loader.graph)
+            if args.output is not None:
+                loader.save(args.output, format=args.format)
+            if args.snapshot is not None:
+                loader.snapshot(args.snapshot)
+    finally:
+        if graph is not None:
+            from icc.mothurpim.store import close_store
+            close_store(graph)
+    stats.log("# {} triples".format(count))
+    save_stats(args, stats)
+    return 0
+
+
+def cmd_show(args):
+    if args.snapshot is not None:
+        from icc.mothurpim.snapshot import Snapshot, local_name
+        with Snapshot(args.snapshot) as s:
+            params = s.parameters(args.command)
+            if params is None:
+                print("Unknown command: {}".format(args.command))
+                return 1
+            rows = [(d.get("title", ""), local_name(d.get("type", "")),
+                     d.get("optionsDefault", ""), d.get("required") == "true")
+                    for d in params]
+            patterns = s.patterns(args.command)
+    elif args.sources is not None:
+        from icc.mothurpim.loader import Loader
+        from icc.mothurpim.spec import Spec
+        from icc.mothurpim.stats import Stats
+        loader = Loader(args.sources, recursive=args.recursive,
+                        stats=Stats(verbose=False))
+        try:
+            loader.command(args.command)
+        except KeyError:
+            print("Unknown command: {}".format(args.command))
+            return 1
+        c = Spec(loader.graph).command(args.command)
+        rows = [(p.name, p.type, p.default, p.required)
+                for p in c.parameters]
+        patterns = sorted((t, p) for t, ps in c.patterns.items() for p in ps)
+    else:
+        raise ValueError("either --snapshot or --sources is needed")
+    print(args.command)
+    for name, type, default, required in rows:
+        print("  {:<24} {:<12} {:<16} {}".format(
+            name, type, default, "required" if required else ""))
+    for type, pattern in patterns:
+        print("  output {}: {}".format(type, pattern))
+    return 0
+
+
+def cmd_delta(args):
+    from icc.mothurpim.loader import Loader
+    stats = make_stats(args)
+    loader = Loader(args.sources, cache=args.cache,
+                    recursive=args.recursive, stats=stats)
+    changes = loader.delta(args.previous)
+    s = changes.summary()
+    print("# {} added, {} removed triples".format(s["added"], s["removed"]))
+    for key in ("commands_added", "commands_removed",
+                "parameters_added", "parameters_removed", "changed"):
+        for iri in s[key]:
+            print("{} {}".format(key, iri))
+    if args.sparql is not None:
+        changes.write_sparql(args.sparql, graph=args.graph)
+    if args.ntriples is not None:
+        changes.write_ntriples(args.ntriples)
+    save_stats(args, stats)
+    return 0
+
+
+def cmd_suite(args):
+    from icc.mothurpim import suite
+    from icc.mothurpim.store import STORE
+    stats = make_stats(args)
+    if args.hgroot is not None:
+        # OUTDIR is computed from HGROOT on import
+        suite.HGROOT = os.path.abspath(args.hgroot)
+        suite.OUTDIR = os.path.join(os.path.dirname(suite.HGROOT), "output")
+    if args.outdir is not None:
+        suite.OUTDIR = os.path.abspath(args.outdir)
+    cache = True if args.cache is None else args.cache
+    if args.no_cache:
+        cache = False
+    count = suite.main(stream=args.stream, workers=args.workers,
+                       cache=cache, processes=args.processes,
+                       store=args.store, backend=args.backend or STORE,
+                       stats=stats, nquads=args.nquads)
+    if count is not None:
+        stats.log("# {} triples".format(count))
+    save_stats(args, stats)
+    return 0
+
+
+def cmd_export(args):
+    from icc.mothurpim.store import (open_store, close_store, STORE,
+                                     SPEC_GRAPH, SUITE_GRAPH)
+    identifier = SUITE_GRAPH if args.graph == "suite" else SPEC_GRAPH
+    g = open_store(args.store, args.backend or STORE, identifier)
+    try:
+        g.serialize(destination=args.output, format=args.format,
+                    encoding="utf-8")
+    finally:
+        close_store(g)
+    return 0
+
+
+def cmd_cache(args):
+    from icc.mothurpim.cache import status
+    s = status(args.directory)
+    if s is None:
+        print("No cache in {}".format(args.directory))
+        return 1
+    print("{}: {} records of extractor version {}, {} bytes".format(
+        args.directory, s["records"], s["version"], s["bytes"]))
+    return 0
+
+
+def cmd_bench(args):
+    from icc.mothurpim.bench import main as bench
+    return bench(args.extra)
+
+
+def common(parser):
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="do not print the progress")
+    parser.add_argument("--stats", help="file to save the statistics to")
+
+
+def sources(parser):
+    parser.add_argument("sources", help="mothur commands directory")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="search subdirectories for commands too")
+    parser.add_argument("--cache", help="directory of the record cache")
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog="icc.mothurpim", description=__doc__,
+        formatter_class=argparse.RawTextHelpFormatter)
+    sub = parser.add_subparsers(dest="subcommand", metavar="subcommand")
+
+    p = sub.add_parser("extract", help="extract the specification "
+                       "from the mothur sources")
+    sources(p)
+    common(p)
+    p.add_argument("-o", "--output", help="file to save the graph to")
+    p.add_argument("-f", "--format", default="ttl",
+                   help="rdflib format of the output (ttl)")
+    p.add_argument("--stream", action="store_true",
+                   help="write N-Triples to the output while extracting")
+    p.add_argument("--nquads", action="store_true",
+                   help="stream N-Quads of the spec graph instead")
+    p.add_argument("--snapshot", help="file to save a binary snapshot to")
+    p.add_argument("--store", help="persistent store to load to")
+    p.add_argument("--backend", help="rdflib store plugin (BerkeleyDB)")
+    p.add_argument("-j", "--workers", type=int, default=1,
+                   help="processes parsing the sources")
+    p.set_defaults(func=cmd_extract)
+
+    p = sub.add_parser("show", help="show the parameters of a command")
+    p.add_argument("command", help="mothur command name")
+    p.add_argument("--snapshot", help="binary snapshot to look it up in")
+    p.add_argument("--sources", help="mothur commands directory "
+                   "to extract it from")
+    p.add_argument("-r", "--recursive", action="store_true")
+    p.set_defaults(func=cmd_show)
+
+    p = sub.add_parser("delta", help="compare the sources with "
+                       "a previous specification")
+    sources(p)
+    common(p)
+    p.add_argument("previous", help="N-Triples file or binary snapshot")
+    p.add_argument("--sparql", help="file to write a SPARQL Update to")
+    p.add_argument("--graph", help="named graph of the SPARQL Update")
+    p.add_argument("--ntriples", help="prefix of the N-Triples "
+                   "-added.nt and -removed.nt files")
+    p.set_defaults(func=cmd_delta)
+
+    p = sub.add_parser("suite", help="convert the Galaxy mothur suite")
+    common(p)
+    p.add_argument("--hgroot", help="directory of the cloned sheds")
+    p.add_argument("--outdir", help="directory of the output files "
+                   "(output beside the hgroot)")
+    p.add_argument("--stream", action="store_true",
+                   help="write only N-Triples, shed by shed")
+    p.add_argument("--nquads", action="store_true",
+                   help="stream N-Quads of the suite graph instead")
+    p.add_argument("--store", help="persistent store to write to")
+    p.add_argument("--backend", help="rdflib store plugin (BerkeleyDB)")
+    p.add_argument("--cache", help="directory of the converted sheds")
+    p.add_argument("--no-cache", action="store_true")
+    p.add_argument("-w", "--workers", type=int, default=8,
+                   help="concurrent clones")
+    p.add_argument("-j", "--processes", type=int, default=1,
+                   help="processes converting the sheds")
+    p.set_defaults(func=cmd_suite)
+
+    p = sub.add_parser("export", help="serialize a graph "
+                       "of a persistent store")
+    p.add_argument("store", help="persistent store")
+    p.add_argument("output", help="file to save the graph to")
+    p.add_argument("--graph", choices=("spec", "suite"), default="spec")
+    p.add_argument("--backend", help="rdflib store plugin (BerkeleyDB)")
+    p.add_argument("-f", "--format", default="ttl",
+                   help="rdflib format of the output (ttl)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("cache", help="show the record cache status")
+    p.add_argument("directory", help="directory of the record cache")
+    p.set_defaults(func=cmd_cache)
+
+    p = sub.add_parser("bench", help="run the benchmarks, "
+                       "see bench --help", add_help=False)
+    p.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = make_parser()
+    # The arguments of bench are its own
+    args, args.extra = parser.parse_known_args(argv)
+    if args.extra and args.subcommand != "bench":
+        parser.error("unrecognized arguments: {}".format(
+            " ".join(args.extra)))
+    if args.subcommand is None:
+        parser.print_help()
+        return 1
+    try:
+        return args.func(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+from rdflib import RDF
+from icc.ngs.namespace import NGSP
+from icc.mothurpim.ntriples import nt_term, nt_row
+from icc.mothurpim.snapshot import MAGIC, Snapshot
+import hashlib
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+# The changes between two versions of the specification as sets of
+# triples in N-Triples form. The lines of the previous version are
+# only kept as digests, so the triples are compared by hashes and
+# nothing is parsed. The nodes must be IRIs, which are the same in
+# both versions, blank nodes are never equal.
+
+MODULE = " {} {} .\n".format(nt_term(RDF.type), nt_term(NGSP.Module))
+PARAMETER = " {} {} .\n".format(nt_term(RDF.type), nt_term(NGSP.Parameter))
+
+
+def subject(line):
+    s = line[:line.index(" ")]
+    return s[1:-1] if s.startswith("<") else s
+
+
+def digest(line):
+    return hashlib.blake2b(line.encode("utf-8"), digest_size=16).digest()
+
+
+def graph_lines(graph):
+    """The N-Triples lines of the triples of `graph`."""
+    for triple in graph:
+        yield nt_row(triple)
+
+
+def file_lines(filename):
+    """Generates the N-Triples lines of a binary snapshot
+    or an N-Triples file (as Loader.stream writes them).
+    """
+    with open(filename, "rb") as i:
+        snapshot = i.read(len(MAGIC)) == MAGIC
+    if snapshot:
+        with Snapshot(filename) as s:
+            for row in s.rows():
+                yield row
+        return
+    with open(filename, encoding="utf-8") as i:
+        for line in i:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line + "\n"
+
+
+class Delta:
+    """Lists of the `added` and `removed` N-Triples lines."""
+
+    def __init__(self, added, removed):
+        self.added = added
+        self.removed = removed
+
+    def __bool__(self):
+        return bool(self.added or self.removed)
+
+    def summary(self):
+        """The added and removed commands and parameters (their
+        IRIs), and the other nodes whose triples changed.
+        """
+        def typed(lines, suffix):
+            return sorted(subject(line) for line in lines
+                          if line.endswith(suffix))
+
+        changed = set(subject(line) for line in self.added + self.removed)
+        s = {"added": len(self.added),
+             "removed": len(self.removed),
+             "commands_added": typed(self.added, MODULE),
+             "commands_removed": typed(self.removed, MODULE),
+             "parameters_added": typed(self.added, PARAMETER),
+             "parameters_removed": typed(self.removed, PARAMETER)}
+        whole = set()
+        for key in ("commands_added", "commands_removed",
+                    "parameters_added", "parameters_removed"):
+            whole.update(s[key])
+        s["changed"] = sorted(changed - whole)
+        return s
+
+    def write_ntriples(self, prefix):
+        """Writes the `prefix`-added.nt and `prefix`-removed.nt files."""
+        for name, lines in (("added", self.added),
+                            ("removed", self.removed)):
+            with open("{}-{}.nt".format(prefix, name), "w",
+                      encoding="utf-8") as o:
+                o.writelines(lines)
+
+    def write_sparql(self, filename, graph=None):
+        """Writes the delta as a SPARQL Update of the default
+        graph or of the named `graph`.
+        """
+        if any(line.startswith("_:") or " _:" in line
+               for line in self.added + self.removed):
+            raise ValueError("blank nodes cannot be deleted by a SPARQL Update")
+        with open(filename, "w", encoding="utf-8") as o:
+            for op, lines in (("DELETE", self.removed),
+                              ("INSERT", self.added)):
+                if not lines:
+                    continue
+                o.write("{} DATA {{\n".format(op))
+                if graph is not None:
+                    o.write("GRAPH <{}> {{\n".format(graph))
+                o.writelines(lines)
+                if graph is not None:
+                    o.write("}\n")
+                o.write("} ;\n")
+
+
+def delta(previous, current):
+    """Compares the `previous` N-Triples lines, which are read
+    twice, with the `current` ones. `previous` is a file name
+    (see file_lines) or a function returning the lines.
+    Returns the Delta.
+    """
+    if isinstance(previous, str):
+        filename = previous
+
+        def previous():
+            return file_lines(filename)
+
+    old = set(digest(line) for line in previous())
+    lines = {}
+    for line in current:
+        lines[digest(line)] = line
+    added = [line for d, line in lines.items() if d not in old]
+    removed = []
+    for line in previous():
+        d = digest(line)
+        if d not in lines:
+            removed.append(line)
+            lines[d] = None  # Once, even if repeated
+    added.sort()
+    removed.sort()
+    return Delta(added, removed)
@@ -0,0 +1,337 @@
+import re
+import functools
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+# Lightweight streaming C++ lexer, enough to find the command
+# definitions in mothur sources in one linear pass.
+
+COMMENT = "comment"
+STRING = "string"
+CHAR = "char"
+IDENT = "ident"
+NUMBER = "number"
+SPACE = "space"
+OP = "op"
+
+RE_TOKEN = re.compile(r'''
+  (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+| (?P<string>"(?:[^"\\\n]|\\.)*"?)
+| (?P<char>'(?:[^'\\\n]|\\.)*'?)
+| (?P<ident>[A-Za-z_]\w*)
+| (?P<number>\.?\d[\w.]*)
+| (?P<space>\s+)
+| (?P<op>==|!=|\+=|->|::|&&|\|\||.)
+''', re.DOTALL | re.VERBOSE)
+
+SKIP = {COMMENT, SPACE}
+
+# Code which is not one of the keywords. Every alternative is
+# determined by its first character, and the keyword group is
+# optional, so the repetition never backtracks.
+SEEK = r'''
+(?:
+  [^"'/A-Za-z_]+
+| /(?![/*])
+| //[^\n]*
+| /\*.*?(?:\*/|\Z)
+| "(?:[^"\\\n]|\\.)*"?
+| '(?:[^'\\\n]|\\.)*'?
+| (?!(?:{kw})\b)[A-Za-z_]\w*
+)*
+(?:(?P<kw>{kw})\b)?
+'''
+
+LITERALS = r'''
+  "(?:[^"\\\n]|\\.)*"?
+| '(?:[^'\\\n]|\\.)*'?
+| //[^\n]*
+| /\*.*?(?:\*/|\Z)
+'''
+
+# Brackets outside literals and comments.
+RE_BRACKET = re.compile(r'(?:'+LITERALS+r')|(?P<br>[(){}\[\]])',
+                        re.DOTALL | re.VERBOSE)
+
+RE_COMMENTS = re.compile(r'(?P<lit>"(?:[^"\\\n]|\\.)*"?|\'(?:[^\'\\\n]|\\.)*\'?)'
+                         r'|//[^\n]*|/\*.*?(?:\*/|\Z)', re.DOTALL)
+
+# `== "type"` and `pattern = "..."` outside other literals.
+RE_GOP_PAIR = re.compile(r'''
+  ==\s*"(?P<type>(?:[^"\\\n]|\\.)*)"
+| \bpattern\s*=\s*"(?P<pattern>(?:[^"\\\n]|\\.)*)"
+| '''+LITERALS, re.DOTALL | re.VERBOSE)
+
+CLOSE = {"(": ")", "{": "}", "[": "]"}
+
+
+@functools.lru_cache()
+def seeker(keywords):
+    kw = "|".join(sorted(keywords))
+    return re.compile(SEEK.replace("{kw}", kw), re.DOTALL | re.VERBOSE)
+
+
+def tokenize(text):
+    """Returns the list of (kind, text, start) tokens
+    of `text` without comments and whitespace.
+    """
+    return [(m.lastgroup, m.group(), m.start())
+            for m in RE_TOKEN.finditer(text)
+            if m.lastgroup not in SKIP]
+
+
+def strip_comments(text):
+    """Removes the comments from `text`, leaving string
+    literals intact.
+    """
+    if "/" not in text:
+        return text
+    return RE_COMMENTS.sub(lambda m: m.group("lit") or "", text)
+
+
+def unquote(token):
+    """The contents of a string literal without the quotes,
+    escape sequences are kept as is.
+    """
+    return token[1][1:-1]
+
+
+class Lexer:
+    """Streams the tokens of `text`. The code between the
+    `keywords` is skipped by `seek` without tokenizing it.
+    """
+
+    def __init__(self, text, keywords):
+        self.text = text
+        self.pos = 0
+        self.re_seek = seeker(frozenset(keywords))
+
+    def seek(self):
+        """Advances past the next keyword and returns it,
+        returns None at the end of the text.
+        """
+        m = self.re_seek.match(self.text, self.pos)
+        self.pos = m.end()
+        if m.group("kw") is None:
+            return None
+        return m.group("kw")
+
+    def next(self):
+        """Returns the next (kind, text, start) token, skipping
+        comments and whitespace, None at the end of the text.
+        """
+        text = self.text
+        while True:
+            m = RE_TOKEN.match(text, self.pos)
+            if m is None:
+                return None
+            self.pos = m.end()
+            if m.lastgroup not in SKIP:
+                return (m.lastgroup, m.group(), m.start())
+
+    def unread(self, token):
+        if token is not None:
+            self.pos = token[2]
+
+    def expect(self, *texts):
+        """Reads the tokens if their texts are `texts`, otherwise
+        stays before the first mismatched token.
+        """
+        for t in texts:
+            token = self.next()
+            if token is None or token[1] != t:
+                self.unread(token)
+                return False
+        return True
+
+    def kind(self, kind):
+        """Reads and returns the next token if it is of `kind`."""
+        token = self.next()
+        if token is None or token[0] != kind:
+            self.unread(token)
+            return None
+        return token
+
+    def strings(self):
+        """Concatenates adjacent string literals, returns None
+        if there is no literal.
+        """
+        value = None
+        while True:
+            token = self.kind(STRING)
+            if token is None:
+                return value
+            value = (value or "") + unquote(token)
+
+    def balanced(self, opening):
+        """Skips the text up to the bracket closing `opening`
+        token, which has just been read, and returns the
+        position of the closing bracket.
+        """
+        br = opening[1]
+        close = CLOSE[br]
+        depth = 1
+        for m in RE_BRACKET.finditer(self.text, self.pos):
+            t = m.group("br")
+            if t == br:
+                depth += 1
+            elif t == close:
+                depth -= 1
+                if depth == 0:
+                    self.pos = m.end()
+                    return m.start()
+        raise ValueError("unbalanced '{}' at line {}".format(
+            br, self.line(opening[2])))
+
+    def line(self, pos):
+        return self.text.count("\n", 0, pos) + 1
+
+
+def simple_methods(text, names):
+    """Finds the values of `name() { return "value"; }`
+    method definitions for the method names in `names`.
+    """
+    found = {}
+    lexer = Lexer(text, names)
+    while True:
+        name = lexer.seek()
+        if name is None:
+            return found
+        if name in found or \
+           not lexer.expect("(", ")", "{", "return"):
+            continue
+        value = lexer.strings()
+        if value is not None and lexer.expect(";", "}"):
+            found[name] = value
+
+
+PARTS = ("CommandParameter", "helpString", "getOutputPattern")
+
+
+def command_parts(text):
+    """Finds the command parameter definitions, help string
+    parts and the getOutputPattern method in a command source.
+
+    Returns a tuple (params, helps, gop), where params is a list of
+    (name, arguments text, start) tuples, helps is a list of string
+    values and gop is None or a tuple (method text, parameter name,
+    patterns).
+    """
+    params = []
+    helps = []
+    gop = None
+    lexer = Lexer(text, PARTS)
+    while True:
+        kw = lexer.seek()
+        if kw is None:
+            return params, helps, gop
+        start = lexer.pos - len(kw)
+        if kw == "CommandParameter":
+            name = lexer.kind(IDENT)
+            opening = lexer.next()
+            if name is None or opening is None or opening[1] != "(":
+                lexer.unread(opening)
+                continue
+            end = lexer.balanced(opening)
+            args = text[opening[2]+1:end]
+            if lexer.expect(";"):
+                params.append((name[1], strip_comments(args), start))
+        elif kw == "helpString":
+            if lexer.expect("+=") or lexer.expect("="):
+                value = lexer.strings()
+                if value is not None:
+                    helps.append(value)
+        elif gop is None:  # getOutputPattern
+            if not lexer.expect("(", "string"):
+                continue
+            pname = lexer.kind(IDENT)
+            if pname is None or not lexer.expect(")"):
+                continue
+            opening = lexer.next()
+            if opening is None or opening[1] != "{":
+                lexer.unread(opening)
+                continue
+            body = strip_comments(text[start:lexer.balanced(opening)+1])
+            gop = (body, pname[1], output_patterns(body))
+
+
+def output_patterns(body):
+    """Collects (type, pattern) pairs of `type == "..."` conditions
+    followed by `pattern = "..."` assignments.
+    """
+    patterns = []
+    pending = None
+    for m in RE_GOP_PAIR.finditer(body):
+        t, p = m.group("type", "pattern")
+        if t is not None:
+            pending = t
+        elif p is not None and pending is not None:
+            patterns.append((pending, p))
+            pending = None
+    return patterns
+
+
+# A constructor argument: string literals (adjacent ones are
+# concatenated), a boolean or a number.
+ARGUMENT = r"""
+(?:
+  (?P<string>"(?:[^"\\\n]|\\.)*"(?:\s*"(?:[^"\\\n]|\\.)*")*)
+| (?P<bool>true|false)\b
+| (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+)"""
+
+RE_ARGUMENT = re.compile(r"\s*"+ARGUMENT+r"\s*(?P<sep>,|\Z)", re.VERBOSE)
+ANONYMOUS = re.sub(r"\(\?P<\w+>", "(?:", ARGUMENT)
+RE_ARGUMENTS = re.compile(r"\s*(?:"+ANONYMOUS+r"\s*,\s*)*"+ANONYMOUS+r"\s*",
+                          re.VERBOSE)
+RE_VALUE = re.compile(ARGUMENT, re.VERBOSE)
+
+RE_LITERAL = re.compile(r'"((?:[^"\\\n]|\\.)*)"')
+RE_ESCAPE = re.compile(r'\\(.)')
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0"}
+
+
+def unescape(value):
+    if "\\" not in value:
+        return value
+    return RE_ESCAPE.sub(lambda m: ESCAPES.get(m.group(1), m.group(1)),
+                         value)
+
+
+def parse_arguments(text):
+    """Parses the comment-free arguments of a constructor
+    made of literals into a list of Python values.
+    """
+    if RE_ARGUMENTS.fullmatch(text) is None:
+        if not text.strip():
+            return []
+        return parse_error(text)
+    values = []
+    for string, boolean, number in RE_VALUE.findall(text):
+        if string:
+            value = string[1:-1]
+            if '"' in value or "\\" in value:
+                value = "".join(unescape(v) for v in RE_LITERAL.findall(string))
+        elif boolean:
+            value = boolean == "true"
+        else:
+            try:
+                value = int(number)
+            except ValueError:
+                value = float(number)
+        values.append(value)
+    return values
+
+
+def parse_error(text):
+    """Finds the first malformed argument and raises ValueError."""
+    pos = 0
+    n = 1
+    while True:
+        m = RE_ARGUMENT.match(text, pos)
+        if m is None or m.group("sep") != ",":
+            break
+        pos = m.end()
+        n += 1
+    raise ValueError("cannot parse argument {} near '{}'".format(
+        n, text[pos:pos+30].strip()))
@@ -1,9 +1,20 @@
 from rdflib import Graph, Literal, BNode, Namespace, RDF, URIRef, RDFS
 from rdflib.namespace import DC, DCTERMS, FOAF, XSD
 from icc.ngs.namespace import NGS, NGSP, NGSS, SCHEMA, V, OSLC, CNT, NCO, CUR
-from pkg_resources import resource_dir
+from icc.mothurpim.cache import RecordCache
+from icc.mothurpim.ntriples import NTriplesWriter
+from icc.mothurpim.snapshot import write_snapshot
+from icc.mothurpim.stats import Stats
+from icc.mothurpim.delta import delta, graph_lines
+from icc.mothurpim.lexer import (simple_methods, command_parts,
+                                 parse_arguments)
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+import mmap
+import io
+import time
 import re
-import glob
+import os
 import os.path
 
 # URL: https://github.com/eugeneai/icc.mothurpim
@@ -11,17 +22,96 @@ import os.path
 
 CPPEXT = ".cpp"
 HEXT = ".h"
+HEXTS = (HEXT, ".hpp", ".hh", ".hxx")
+
+# Increment when extraction changes the records it produces,
+# so the cached records are invalidated.
+EXTRACTOR_VERSION = 2
+
+NAME_METHOD = {"getCommandName": "name"}
+
+
+def index_sources(sourcedir, recursive=False):
+    """Scans `sourcedir` once and pairs the command sources
+    with their headers. Returns a dictionary mapping a path
+    stem to a (cpp, header) tuple and a sorted list of the
+    sources having no header.
+    """
+    cpps = {}
+    headers = {}
+    dirs = [sourcedir]
+    while dirs:
+        with os.scandir(dirs.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if recursive:
+                        dirs.append(entry.path)
+                    continue
+                stem, ext = os.path.splitext(entry.path)
+                if ext == CPPEXT:
+                    cpps[stem] = entry.path
+                elif ext in HEXTS:
+                    # Prefer exactly .h to .hpp and others
+                    if ext == HEXT or stem not in headers:
+                        headers[stem] = entry.path
+
+    index = {}
+    unmatched = []
+    for stem, cpp in cpps.items():
+        header = headers.get(stem)
+        if header is None:
+            unmatched.append(cpp)
+        else:
+            index[stem] = (cpp, header)
+    unmatched.sort()
+    return index, unmatched
+
+
+def command_name(header):
+    """The getCommandName value of `header`, None if it
+    is not a command header.
+    """
+    text = CommandLoader(None, None, header, False).readfile(header)
+    return simple_methods(text, NAME_METHOD).get("getCommandName")
 
 
 class Loader:
     """Loads Mothur commands from a directory of command
-    sources to a graph.
+    sources to a graph, all of them by `load` or one by one,
+    when they are requested, by `command`.
     """
 
-    def __init__(self, sourcedir):
+    def __init__(self, sourcedir, workers=1, cache=None, recursive=False,
+                 graph=None, stats=None):
+        """If `workers` is greater than 1 (or None, meaning
+        the number of CPUs), the command sources are parsed
+        in a process pool and only merged into the graph here.
+        `cache` is a directory (or a RecordCache) where the
+        extracted records are kept between runs.
+        If `recursive` is true, subdirectories of `sourcedir`
+        are searched for commands too.
+        `graph` is the graph to load to, e.g. one in a persistent
+        store opened by store.open_store, a new in-memory graph
+        by default.
+        `stats` is a stats.Stats collecting the timings and
+        counters, it also tells whether the progress is printed.
+        """
         self.sourcedir = sourcedir
+        self.recursive = recursive
+        self.unmatched = []
+        self.workers = workers
+        if stats is None:
+            stats = Stats()
+        self.stats = stats
+        if isinstance(cache, str):
+            cache = RecordCache(cache, EXTRACTOR_VERSION, stats.log)
+        self.cache = cache
         self.loaded = False
-        g = self.graph = Graph()
+        self.names = None  # Command name -> (cpp, header), see index
+        self.built = {}  # Command name -> record
+        if graph is None:
+            graph = Graph()
+        g = self.graph = graph
 
         self.spec = NGSP.spec
 
@@ -42,27 +132,185 @@ class Loader:
     def load(self):
         if self.loaded:
             return self.graph
-        # Traverse all .h and .cpp files
-        # with searching command definitions.
-
-        findnames = self.sourcedir+"/*"+CPPEXT
-        files = glob.glob(findnames)
-        for f in files:
-            name = f.replace(CPPEXT, "")
-            header = glob.glob(name+HEXT+"*")[0]
-            print("Processing -----: ", f, header)
-            fl = CommandLoader(self, f, header)
-            fl.load()
+        done = set(record["cpp"] for record in self.built.values())
+        with self.stats.timer("load"):
+            for record in self.records(skip=done):
+                self.add(record)
+                if record["name"] is not None:
+                    self.built[record["name"]] = record
+        self.flush()
 
         self.loaded = True
         return self.graph
 
+    def index(self):
+        """Scans only the headers of the source directory for
+        the command names. Returns a dictionary mapping the names
+        to (cpp, header) tuples.
+        """
+        if self.names is not None:
+            return self.names
+        with self.stats.timer("index"):
+            pairs, self.unmatched = index_sources(self.sourcedir,
+                                                  recursive=self.recursive)
+            names = {}
+            for stem in sorted(pairs):
+                cpp, header = pairs[stem]
+                name = command_name(header)
+                if name is not None:
+                    names.setdefault(name, (cpp, header))
+        self.names = names
+        return names
+
+    def command(self, name):
+        """Extracts the command `name` and adds it to the graph
+        on the first request, returns its node. Raises KeyError
+        if there is no such command in the source directory.
+        """
+        if name not in self.built:
+            cpp, header = self.index()[name]
+            with self.stats.timer("command"):
+                record, = self.extract([cpp], [header], prune=False)
+                self.add(record)
+            self.built[name] = record
+        return CUR[name]
+
+    def records(self, skip=()):
+        """Generates the records of all the commands of
+        the source directory, but those of `skip` sources.
+        """
+        # Traverse all .h and .cpp files
+        # with searching command definitions.
+
+        with self.stats.timer("discovery"):
+            index, self.unmatched = index_sources(self.sourcedir,
+                                                  recursive=self.recursive)
+        for f in self.unmatched:
+            self.stats.log("WARNING: No header for {}".format(f))
+        pairs = [index[stem] for stem in sorted(index)
+                 if index[stem][0] not in skip]
+        files = [cpp for cpp, header in pairs]
+        headers = [header for cpp, header in pairs]
+        return self.extract(files, headers, prune=not skip)
+
+    def stream(self, out, identifier=None):
+        """Writes the specification to `out` (a file name or a
+        text file) as N-Triples while the commands are being
+        extracted, the graph is not kept in memory. If `identifier`
+        is given, N-Quads of the graph of that name are written.
+        Returns the number of triples written.
+        """
+        graph = self.graph
+        with NTriplesWriter(out, identifier) as w:
+            self.graph = w
+            try:
+                w.add((self.spec, RDF.type, NGSP.Specification))
+                with self.stats.timer("stream"):
+                    for record in self.records():
+                        self.add(record)
+            finally:
+                self.graph = graph
+        self.flush()
+        return w.count
+
+    def flush(self):
+        """Saves the record cache, if it has changed. The records
+        extracted by `command` are saved only by flush, load and
+        stream, not to rewrite the cache for every command.
+        """
+        if self.cache is not None:
+            self.cache.save()
+
+    def extract(self, files, headers, prune=True):
+        """Returns command records for the source pairs in the
+        order of `files`. Only the pairs missing in the cache
+        are parsed. If `prune` is true, the cached records of
+        other sources are evicted.
+        """
+        cache = self.cache
+        if cache is None:
+            return self.parse(files, headers)
+        keys = [cache.key(h, f) for f, h in zip(files, headers)]
+        records = [cache.get(key) for key in keys]
+        missing = [i for i, r in enumerate(records) if r is None]
+        parsed = self.parse([files[i] for i in missing],
+                            [headers[i] for i in missing])
+        for i, record in zip(missing, parsed):
+            cache.put(keys[i], record)
+            records[i] = record
+        for f, h, record in zip(files, headers, records):
+            record.update(cpp=f, h=h)  # The tree might be moved
+        self.stats.count("cache.hits", len(files) - len(missing))
+        self.stats.count("cache.misses", len(missing))
+        self.stats.log("# Cache: {} hits, {} misses".format(
+            cache.hits, cache.misses))
+        if prune:
+            cache.prune(keys)
+        return records
+
+    def parse(self, files, headers):
+        """Generates command records for the source pairs
+        in the order of `files`, serially or in a process pool.
+        """
+        stats = self.stats
+        verbose = [stats.verbose] * len(files)
+        if self.workers == 1 or len(files) < 2:
+            measured = map(extract_measured, files, headers, verbose)
+            for f, (record, seconds, size) in zip(files, measured):
+                self.measure(f, seconds, size)
+                yield record
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            measured = pool.map(extract_measured, files, headers, verbose,
+                                chunksize=4)
+            for f, (record, seconds, size) in zip(files, measured):
+                self.measure(f, seconds, size)
+                yield record
+
+    def measure(self, f, seconds, size):
+        """Accounts the extraction of `f`, the times of the
+        files parsed in parallel are summed.
+        """
+        stats = self.stats
+        stats.item("file", f, seconds=seconds, bytes=size)
+        stats.add_time("extraction", seconds)
+        stats.count("files")
+        stats.count("bytes", size)
+
+    def add(self, record):
+        """Merges a command record into the graph."""
+        if record["name"] is None:
+            return
+        start = time.perf_counter()
+        n = CommandLoader(self, record["cpp"], record["h"]).build(record)
+        seconds = time.perf_counter() - start
+        self.stats.add_time("build", seconds)
+        self.stats.count("triples", n)
+        self.stats.item("command", record["name"], triples=n, seconds=seconds)
+
     def save(self, filename, format="rdf"):
-        g = self.graph
-        s = self.graph.serialize(format=format)
-        o = open(filename, "wb")
-        o.write(s)
-        o.close()
+        # Serialize to the file stream, not to a string
+        self.graph.serialize(destination=filename, format=format,
+                             encoding="utf-8")
+
+    def delta(self, previous):
+        """Compares the specification with its `previous` version,
+        an N-Triples file or a binary snapshot, and returns the
+        delta.Delta. The graph is not kept, unless it is loaded.
+        """
+        if self.loaded:
+            current = graph_lines(self.graph)
+        else:
+            out = io.StringIO()
+            self.stream(out)
+            current = out.getvalue().splitlines(True)
+        return delta(previous, current)
+
+    def snapshot(self, filename):
+        """Writes the graph to a binary snapshot, see
+        snapshot.Snapshot. Returns the number of triples.
+        """
+        return write_snapshot(self.graph, filename)
 
 
 # NAME = "[a-zA-Z.]+"
@@ -91,6 +339,11 @@ RE_GOP_NAME = re.compile(
 RE_GOP_RECORD = re.compile(
     r'if.+?==\s+"((\w|-)+)".+?pattern\s*=\s*"(.*?)"', re.DOTALL)  # re.MULTILINE
 
+SIMPLE_METHODS = {"getCommandName": "name",
+                  "getCommandCategory": "category",
+                  "getCitation": "citation",
+                  "getDescription": "description"}
+
 RE_MOTUR_WIKI = re.compile(
     r'((https?|ftp)://www\.mothur\.org/wiki/(\w|\.|-)*)')
 
@@ -141,59 +394,277 @@ def COMPAR(name="",
     return d
 
 
-CTX = {"true": True, "false": False, "compar": COMPAR}
+COMPAR_ARGS = ("name",
+               "type",
+               "options",
+               "optionsDefault",
+               "chooseOnlyOneGroup",
+               "chooseAtLeastOneGroup",
+               "linkedGroup",
+               "outputTypes",
+               "multipleSelectionAllowed",
+               "required",
+               "important")
+
+
+def compar_args(*args):
+    """Names the positional arguments of a CommandParameter
+    constructor, so they can be kept in a plain record.
+    """
+    return dict(zip(COMPAR_ARGS, args))
+
+
+CTX = {"true": True, "false": False, "compar": compar_args}
+
+
+RE_COMMENT = re.compile(r"(.*?)\s+//")
+
+
+def extract(cpp, header):
+    """Parses a command header and source pair into a plain
+    record of strings, lists and booleans. Records can be
+    pickled, so it is also the unit of work of process pools.
+    """
+    return CommandLoader(None, cpp, header).extract()
 
 
-RE_COMMENT = re.compile("(.*?)\s+//")
+def extract_measured(cpp, header, verbose=True):
+    """Returns a tuple of the record of `extract`, the time
+    it took and the number of bytes read.
+    """
+    start = time.perf_counter()
+    cl = CommandLoader(None, cpp, header, verbose)
+    record = cl.extract()
+    return record, time.perf_counter() - start, cl.bytes
 
 
 class CommandLoader:
-    def __init__(self, loader, cpp, header):
+    def __init__(self, loader, cpp, header, verbose=True):
         self.loader = loader
-        self.graph = loader.graph
+        if loader is not None:
+            self.graph = loader.graph
+            verbose = loader.stats.verbose
+        self.verbose = verbose
         self.cpp = cpp
         self.h = header
+        self.bytes = 0
+
+    def log(self, *args):
+        if self.verbose:
+            print(*args)
 
     def load(self):
+        self.build(self.extract())
+
+    def extract(self):
+        self.record = {"cpp": self.cpp, "h": self.h}
+        self.log("Processing -----: ", self.cpp, self.h)
         self.loadh()
-        assert (self.command)
-        self.loadcpp()
+        if self.record["name"] is not None:
+            self.loadcpp()
+        return self.record
+
+    def readfile(self, name):
+        """Decodes the source file `name` straight from its
+        memory map, without an intermediate bytes copy.
+        """
+        with open(name, "rb") as i:
+            size = os.fstat(i.fileno()).st_size
+            self.bytes += size
+            if size == 0:
+                return ""  # Empty files cannot be mapped
+            with mmap.mmap(i.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                text = str(m, "utf-8", "replace")
+        if "\r" in text:  # As the universal newlines of text mode
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def loadh(self):
+        self.text = self.readfile(self.h)
+        found = simple_methods(self.text, SIMPLE_METHODS)
+        if "getCommandName" not in found:
+            # Utility classes are met when whole tree is indexed
+            self.log("WARNING: Not a command: {}".format(self.h))
+            self.record["name"] = None
+            return
+        for method, ent in SIMPLE_METHODS.items():
+            if method not in found:
+                raise ValueError(ent+" not found")
+        self.setheader(found["getCommandName"],
+                       found["getCommandCategory"],
+                       found["getCitation"].replace(r"\n", "\n"),
+                       found["getDescription"])
+
+    def setheader(self, name, category, citation, description):
+        self.log(f"{name}:{category}\n {citation}\n {description}")
+        assert (name)
+        self.commandname = name
+        self.record.update(name=name,
+                           category=category,
+                           citation=citation,
+                           description=description)
+
+    def loadcpp(self):
+        del self.text
+        self.cpptext = self.readfile(self.cpp)
+        record = self.record
+        params, helps, gop = command_parts(self.cpptext)
+
+        record["params"] = []
+        line, pos = 1, 0
+        for pname, defs, start in params:
+            line += self.cpptext.count("\n", pos, start)
+            pos = start
+            record["params"].append(self.processparams(pname, defs, line))
+        record["help"] = self.helptext(helps)
+
+        self.gop = None
+        record.update(gop=None, gopparam=None, patterns=[])
+        if gop is not None:
+            self.gop, gopparam, patterns = gop
+            record.update(gop=self.gop, gopparam=gopparam, patterns=patterns)
+            self.checkpatterns(patterns)
+        else:
+            self.log("WARNING: getOutputPattern not found")
+        del self.cpptext
+
+    def helptext(self, helps):
+        help = "".join(h+r"\n" for h in helps)
+        help = help.replace(r"\n\n", r"\n")
+        help = help.replace(r"\n", "\n")
+        return help.strip()
+
+    def checkpatterns(self, patterns):
+        if not patterns:
+            self.log(self.gop)
+            self.log("WARNING: there should be patterns of file names")
+
+    def processparams(self, pname, defs, line):
+        try:
+            args = parse_arguments(defs)
+            if len(args) > len(COMPAR_ARGS):
+                raise ValueError("too many arguments")
+        except ValueError as e:
+            raise ValueError("{}:{}: malformed CommandParameter {}: {}".format(
+                self.cpp, line, pname, e))
+        return compar_args(*args)
+
+    def build(self, record):
+        """Adds the triples of a command record to the graph,
+        returns their number.
+        """
+        self.out = []
+        add = self.out.append
+        name = record["name"]
+        citation = record["citation"]
+        self.commandname = name
+        res = CUR[self.commandname]
+        self.command = res = URIRef(res)
+        add((res, RDF.type, NGSP["Module"]))
+        add((self.loader.spec, NGSP.module, res))
+        add((res, DC.title, Literal(name)))
+        add((res, DCTERMS.description, Literal(record["description"])))
+        add((res, SCHEMA.citation, Literal(citation)))
+        add((res, V.category, Literal(record["category"])))
+        if citation:
+            m = RE_MOTUR_WIKI.search(citation)
+            if m:
+                add((res, NCO.websiteURL, URIRef(m.group(1))))
+            else:
+                self.log("WARNING: Wiki page not found")
+
+        self.params = {}
+        for index, args in enumerate(record["params"]):
+            self.buildparams(COMPAR(**args), index)
+
+        help = self.help = record["help"]
+        if help:
+            add((res, SCHEMA.softwareHelp, Literal(help)))
+
+        self.gop = record["gop"]
+        if self.gop is not None:
+            gopr = CUR["{}-output-pattern".format(name)]
+            add((gopr, RDF.type, CNT.Chars))
+            add((res, NGSP.outputPattern, gopr))
+            add((gopr, CNT.chars, Literal(self.gop)))
+            self.gopparam = record["gopparam"]
+            add((gopr, NGSP.parameterName, Literal(self.gopparam)))
+            self.buildgop(gopr, record["patterns"])
+
+        g = self.graph
+        g.addN((s, p, o, g) for s, p, o in self.out)
+        return len(self.out)
+
+    def buildparams(self, defs, index):
+        add = self.out.append
+        name = defs[DC.title]
+        self.params[name] = defs
+
+        p = CUR["{}-{}-parameter".format(self.commandname, name)]
+        add((p, RDF.type, NGSP["Parameter"]))
+        add((self.command, NGSP.parameter, p))
+        add((p, SCHEMA.sku, Literal(index)))  # Stock Keeping Unit
+        for k, v in defs.items():
+            ko = k
+            if type(k) == str:
+                k = NGSP[k]
+            if type(v) == str:
+                if v == "none":
+                    continue
+                if v == "":
+                    if ko != "optionsDefault":
+                        continue
+                v = Literal(v)
+            if type(v) == list:
+                pl = URIRef("{}-{}".format(p, ko))
+                add((pl, RDF.type, OSLC.AllowedValues))
+                add((p, k, pl))
+                # g.add((p, OSLC.allowedValues, pl))
+                for val in v:
+                    add((pl, DC.identifier, Literal(val)))
+            else:
+                add((p, k, v))
+
+    def buildgop(self, gopr, patterns):
+        add = self.out.append
+        self.log("GOPR:", gopr)
+        for t, p in patterns:
+            self.log("PATTERN:{}->{}".format(t, p))
+            ptr = URIRef("{}-{}".format(gopr, quote(t, safe="")))
+            add((gopr, NGSP.pattern, ptr))
+            add((ptr, DC.identifier, Literal(t)))
+            add((ptr, NGSP.patternString, Literal(p)))
+
+
+class RegexCommandLoader(CommandLoader):
+    """The original extractor, which runs the regular
+    expressions over the sources. Kept as a reference
+    for benchmarks.
+    """
 
     def readfile(self, name, op="r"):
         i = open(name, op)
+        self.bytes += os.fstat(i.fileno()).st_size
         s = []
         for l in i:
             m = RE_COMMENT.match(l)
             if m:
                 l = m.group(1)
             s.append(l)
+        i.close()
         return "".join(s)
 
     def loadh(self):
         self.text = self.readfile(self.h)
+        if RE_NAME.search(self.text) is None:
+            self.log("WARNING: Not a command: {}".format(self.h))
+            self.record["name"] = None
+            return
         name = self.find(RE_NAME, "name")
         category = self.find(RE_CAT, "category")
         citation = self.find(RE_CITE, "citation").replace(r"\n", "\n")
         description = self.find(RE_DESCR, "description")
-        print(f"{name}:{category}\n {citation}\n {description}")
-        g = self.graph
-        #filename = os.path.split(self.h)[1].strip()
-        # assert(filename)
-        self.commandname = name
-        res = CUR[self.commandname]
-        self.command = res = URIRef(res)
-        g.add((res, RDF.type, NGSP["Module"]))
-        g.add((self.loader.spec, NGSP.module, res))
-        g.add((res, DC.title, Literal(name)))
-        g.add((res, DCTERMS.description, Literal(description)))
-        g.add((res, SCHEMA.citation, Literal(citation)))
-        g.add((res, V.category, Literal(category)))
-        if citation:
-            m = RE_MOTUR_WIKI.search(citation)
-            if m:
-                g.add((res, NCO.websiteURL, URIRef(m.group(1))))
-            else:
-                print("WARNING: Wiki page not found")
+        self.setheader(name, category, citation, description)
 
     def find(self, re, ent):
         m = re.search(self.text)
@@ -206,98 +677,44 @@ class CommandLoader:
     def loadcpp(self):
         del self.text
         self.cpptext = self.readfile(self.cpp)
+        record = self.record
 
-        g = self.loader.graph
-        res = self.command
-
-        self.params = {}
-        for index, m in enumerate(RE_COMPAR.finditer(self.cpptext)):
-            pname, params = m.groups()
-            self.processparams(pname, params, index)
+        params = record["params"] = []
+        for m in RE_COMPAR.finditer(self.cpptext):
+            pname, defs = m.groups()
+            params.append(self.processparams(pname, defs, None))
 
-        help = ""
-        for m in RE_HELP.finditer(self.cpptext):
-            help += m.group(1)+r"\n"
-        help = help.replace(r"\n\n", r"\n")
-        help = help.replace(r"\n", "\n")
-        self.help = help
-        #self.help = help
-        # print("HELP->", self.help)
-        help = self.help = self.help.strip()
-        if help:
-            g.add((res, SCHEMA.softwareHelp, Literal(help)))
+        record["help"] = self.helptext(
+            m.group(1) for m in RE_HELP.finditer(self.cpptext))
 
         m = RE_GOP.search(self.cpptext)
         self.gop = None
+        record.update(gop=None, gopparam=None, patterns=[])
         if m:
-            self.gop = m.group(1)
-            # print(self.gop)
-            gopr = BNode()
-            g.add((gopr, RDF.type, CNT.Chars))
-            g.add((res, NGSP.outputPattern, gopr))
-            g.add((gopr, CNT.chars, Literal(self.gop)))
+            self.gop = record["gop"] = m.group(1)
             m = RE_GOP_NAME.search(self.gop)
             if m:
-                self.gopparam = m.group(1)
-                g.add((gopr, NGSP.parameterName, Literal(self.gopparam)))
+                record["gopparam"] = m.group(1)
             else:
                 raise ValueError("cannot recodgnize parameter name")
-            self.process_gop(gopr)
+            record["patterns"] = self.process_gop()
         else:
-            print("WARNING: getOutputPattern not found")
+            self.log("WARNING: getOutputPattern not found")
+        del self.cpptext
 
-    def processparams(self, pname, defs, index):
+    def processparams(self, pname, defs, line):
         s = "compar("+defs+")"
         # print(s)
-        defs = eval(s, CTX)
-        g = self.graph
-        name = defs[DC.title]
-        self.params[name] = defs
+        return eval(s, CTX)
 
-        p = CUR["{}-{}-parameter".format(self.commandname, name)]
-        g.add((p, RDF.type, NGSP["Parameter"]))
-        g.add((self.command, NGSP.parameter, p))
-        g.add((p, SCHEMA.sku, Literal(index)))  # Stock Keeping Unit
-        for k, v in defs.items():
-            ko = k
-            if type(k) == str:
-                k = NGSP[k]
-            if type(v) == str:
-                if v == "none":
-                    continue
-                if v == "":
-                    if ko != "optionsDefault":
-                        continue
-                v = Literal(v)
-            if type(v) == list:
-                pl = BNode()
-                n = BNode()
-                g.add((pl, RDF.type, OSLC.AllowedValues))
-                g.add((p, k, pl))
-                # g.add((p, OSLC.allowedValues, pl))
-                for val in v:
-                    g.add((pl, DC.identifier, Literal(val)))
-            else:
-                g.add((p, k, v))
-
-    def process_gop(self, gopr):
+    def process_gop(self):
         gop = self.gop
         patterns = []
-        g = self.graph
         for m in RE_GOP_RECORD.finditer(gop):
             t, _, p = m.groups()
             patterns.append((t, p))
-        if not patterns:
-            print(gop)
-            print("WARNING: there should be patterns of file names")
-
-        print("GOPR:", gopr)
-        for t, p in patterns:
-            print("PATTERN:{}->{}".format(t, p))
-            ptr = BNode()
-            g.add((gopr, NGSP.pattern, ptr))
-            g.add((ptr, DC.identifier, Literal(t)))
-            g.add((ptr, NGSP.patternString, Literal(p)))
+        self.checkpatterns(patterns)
+        return patterns
 
 
 def rdflib_example():
@@ -0,0 +1,75 @@
+from rdflib import Literal, BNode
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+ESCAPES = {ord("\\"): "\\\\", ord('"'): '\\"',
+           ord("\n"): "\\n", ord("\r"): "\\r"}
+
+
+def nt_term(term):
+    """N-Triples representation of an rdflib term."""
+    if isinstance(term, Literal):
+        s = '"' + str(term).translate(ESCAPES) + '"'
+        if term.language:
+            return s + "@" + term.language
+        if term.datatype:
+            return s + "^^<" + str(term.datatype) + ">"
+        return s
+    if isinstance(term, BNode):
+        return "_:" + str(term)
+    # Not `"<" + term`, URIRef.__radd__ would make an URIRef
+    return "<" + str(term) + ">"
+
+
+def nt_row(triple, identifier=None):
+    """N-Triples line of `triple`, N-Quads one if the name
+    of the graph `identifier` is given.
+    """
+    s, p, o = triple
+    if identifier is None:
+        return "{} {} {} .\n".format(nt_term(s), nt_term(p), nt_term(o))
+    return "{} {} {} {} .\n".format(nt_term(s), nt_term(p), nt_term(o),
+                                     nt_term(identifier))
+
+
+class NTriplesWriter:
+    """A write-only graph, which writes the triples to a file in
+    N-Triples format as soon as they are added. Duplicate triples
+    are not removed. If `identifier` is given, N-Quads of the
+    graph of that name are written instead, e.g. to be loaded
+    into a store.
+    """
+
+    def __init__(self, out, identifier=None):
+        self.close_out = isinstance(out, str)
+        if self.close_out:
+            out = open(out, "w", encoding="utf-8")
+        self.out = out
+        self.identifier = identifier
+        self.count = 0
+
+    def add(self, triple):
+        self.out.write(nt_row(triple, self.identifier))
+        self.count += 1
+
+    def addN(self, quads):
+        for s, p, o, c in quads:
+            self.add((s, p, o))
+
+    def bind(self, prefix, namespace, *args, **kwargs):
+        pass  # N-Triples has no prefixes
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        if self.close_out:
+            self.out.close()
+        else:
+            self.out.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
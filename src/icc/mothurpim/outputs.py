@@ -0,0 +1,150 @@
+import os.path
+import re
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+# Prediction of the output file names of mothur commands from the
+# getOutputPattern patterns. A pattern like
+#
+#   [filename],[tag],fasta-[filename],fasta
+#
+# has alternatives separated by "-", made of the parts separated by
+# ",": variables in brackets and literal extensions. As mothur does,
+# the alternative with as many variables as given is chosen, else
+# the first one with fewer of them.
+
+RE_VARIABLE = re.compile(r"\[(\w+)\]")
+ZIPPED = (".gz",)
+
+
+class OutputPattern:
+    """A compiled output pattern of type `type`."""
+    __slots__ = ("type", "pattern", "alternatives")
+
+    def __init__(self, type, pattern):
+        self.type = type
+        self.pattern = pattern
+        self.alternatives = []
+        for alternative in pattern.split("-"):
+            parts = []
+            for part in alternative.split(","):
+                part = part.strip()
+                m = RE_VARIABLE.fullmatch(part)
+                if m is not None:
+                    parts.append((True, m.group(1)))
+                elif part:
+                    parts.append((False, part))
+            count = sum(1 for var, text in parts if var)
+            self.alternatives.append((count, parts))
+
+    def choose(self, variables):
+        n = len(variables)
+        for count, parts in self.alternatives:
+            if count == n:
+                return parts
+        for count, parts in self.alternatives:
+            if count < n:
+                return parts
+        return None
+
+    def format(self, variables):
+        """The file name for the `variables` dictionary, e.g.
+        {"filename": "dir/stability."}, None if the pattern
+        has no alternative for them.
+        """
+        parts = self.choose(variables)
+        if parts is None:
+            return None
+        names = []
+        for var, text in parts:
+            if var:
+                text = variables.get(text)
+                if text is None:
+                    return None
+                text = text.rstrip(".")
+            if text:
+                names.append(text)
+        return ".".join(names)
+
+    def __repr__(self):
+        return "<OutputPattern {} {}>".format(self.type, self.pattern)
+
+
+def root_name(filename):
+    """The file name up to and including the last dot of
+    its extension, as mothur's getRootName.
+    """
+    for ext in ZIPPED:
+        if filename.endswith(ext):
+            filename = filename[:-len(ext)]
+    base, ext = os.path.splitext(filename)
+    return base + "." if ext else filename + "."
+
+
+class Outputs:
+    """Predicts the outputs of the commands of a spec.Spec.
+    The patterns are compiled once for each (command, type).
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.patterns = {}
+
+    def pattern(self, command, type):
+        """The compiled OutputPattern of the `type` outputs of
+        `command`, None if the command has no such outputs.
+        """
+        key = (command, type)
+        try:
+            return self.patterns[key]
+        except KeyError:
+            pass
+        patterns = self.spec.command(command).patterns.get(type)
+        p = None
+        if patterns:
+            p = OutputPattern(type, patterns[0])
+        self.patterns[key] = p
+        return p
+
+    def variables(self, command, args):
+        """The [filename] variable of the invocation of `command`
+        with the `args` dictionary: the root of its first input
+        file, placed to outputdir, if it is given.
+        """
+        for param in self.spec.command(command).parameters:
+            value = args.get(param.name)
+            if param.type == "InputTypes" and value and value != "current":
+                name = root_name(value)
+                outputdir = args.get("outputdir")
+                if outputdir:
+                    name = os.path.join(outputdir, os.path.basename(name))
+                return {"filename": name}
+        return {}
+
+    def predict(self, command, args, variables=None, types=None):
+        """Returns a dictionary mapping the output types of
+        `command` (or `types` of them) to the file names it
+        would produce when invoked with `args`. `variables`
+        are added to the [filename] one, e.g. {"tag": "pick"}.
+        Types, which cannot be predicted, are omitted.
+        """
+        vs = self.variables(command, args)
+        if variables:
+            vs.update(variables)
+        if types is None:
+            types = self.spec.command(command).patterns
+        predicted = {}
+        for t in types:
+            p = self.pattern(command, t)
+            if p is None:
+                continue
+            name = p.format(vs)
+            if name is not None:
+                predicted[t] = name
+        return predicted
+
+    def predict_all(self, jobs):
+        """Predicts the outputs of (command, args) `jobs`,
+        returns the list of the dictionaries.
+        """
+        return [self.predict(command, args) for command, args in jobs]
@@ -0,0 +1,254 @@
+from array import array
+import mmap
+import re
+import struct
+import sys
+import os
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+# A compact binary snapshot of a specification graph:
+#
+#   header   MAGIC, VERSION, number of strings, triples, blob size
+#   offsets  uint32 * (strings + 1), string i is blob[off[i]:off[i+1]]
+#   triples  uint32 * 3 * triples, string ids sorted by (s, p, o)
+#   blob     UTF-8 strings, sorted
+#
+# A string is the N-Triples form of a term, so a term is a string
+# id. The integers are little-endian. The file is memory-mapped
+# and searched in place, nothing is decoded but the answers.
+
+MAGIC = b"MPIMSNP\0"
+VERSION = 1
+HEADER = struct.Struct("<8s4I")
+
+# The IRIs of icc.ngs.namespace and rdflib spelled out, so that
+# reading a snapshot does not import rdflib.
+NGSP = "http://icc.ru/ontologies/NGS/processing/"
+CUR = "http://icc.ru/ontologies/NGS/mothur/"
+PARAMETER = "<{}parameter>".format(NGSP)
+OUTPUT_PATTERN = "<{}outputPattern>".format(NGSP)
+PATTERN = "<{}pattern>".format(NGSP)
+PATTERN_STRING = "<{}patternString>".format(NGSP)
+IDENTIFIER = "<http://purl.org/dc/elements/1.1/identifier>"
+TYPE = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+
+RE_NT_ESCAPE = re.compile(r'\\(.)')
+NT_ESCAPES = {"n": "\n", "r": "\r"}
+
+
+def write_snapshot(graph, filename):
+    """Writes the triples of `graph` to a snapshot `filename`,
+    returns the number of triples.
+    """
+    from icc.mothurpim.ntriples import nt_term
+    terms = {}
+    for triple in graph:
+        for term in triple:
+            if term not in terms:
+                terms[term] = nt_term(term).encode("utf-8")
+    strings = sorted(set(terms.values()))
+    ids = {s: i for i, s in enumerate(strings)}
+    offsets = array("I", [0])
+    for s in strings:
+        offsets.append(offsets[-1] + len(s))
+    rows = sorted((ids[terms[s]], ids[terms[p]], ids[terms[o]])
+                  for s, p, o in graph)
+    triples = array("I")
+    for row in rows:
+        triples.extend(row)
+    if sys.byteorder != "little":
+        offsets.byteswap()
+        triples.byteswap()
+    tmp = filename+".tmp"
+    with open(tmp, "wb") as o:
+        o.write(HEADER.pack(MAGIC, VERSION, len(strings), len(rows),
+                            offsets[-1]))
+        offsets.tofile(o)
+        triples.tofile(o)
+        for s in strings:
+            o.write(s)
+    os.replace(tmp, filename)
+    return len(rows)
+
+
+def decode(text):
+    """The IRI, blank node label or literal lexical form
+    of a term in the N-Triples form.
+    """
+    if text.startswith('"'):
+        text = text[1:text.rindex('"')]
+        if "\\" in text:
+            text = RE_NT_ESCAPE.sub(
+                lambda m: NT_ESCAPES.get(m.group(1), m.group(1)), text)
+        return text
+    if text.startswith("<"):
+        return text[1:-1]
+    return text[2:]  # _:label
+
+
+def local_name(iri):
+    return re.split(r"[/#]", iri)[-1]
+
+
+class Snapshot:
+    """A memory-mapped snapshot of a specification, answering
+    the questions about the commands without rdflib.
+    """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as i:
+            self.map = mmap.mmap(i.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, nstrings, ntriples, size = \
+            HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError("{} is not a snapshot".format(filename))
+        if version != VERSION:
+            raise ValueError("unsupported snapshot version {}".format(version))
+        self.nstrings = nstrings
+        self.ntriples = ntriples
+        view = memoryview(self.map)
+        start = HEADER.size
+        end = start + 4 * (nstrings + 1)
+        self.offsets = self.ints(view[start:end])
+        start, end = end, end + 12 * ntriples
+        self.triples = self.ints(view[start:end])
+        self.blob = end
+        self.view = view
+        self.identifier = self.find(IDENTIFIER)
+        self.type = self.find(TYPE)
+
+    def ints(self, view):
+        if sys.byteorder == "little":
+            return view.cast("I")
+        a = array("I", view)  # A copy on big-endian machines
+        a.byteswap()
+        return a
+
+    def close(self):
+        for ints in (self.offsets, self.triples):
+            if isinstance(ints, memoryview):
+                ints.release()
+        self.view.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.ntriples
+
+    def raw(self, i):
+        b = self.blob
+        return self.map[b+self.offsets[i]:b+self.offsets[i+1]]
+
+    def string(self, i):
+        """The N-Triples form of the term `i`."""
+        return self.raw(i).decode("utf-8")
+
+    def value(self, i):
+        return decode(self.string(i))
+
+    def rows(self):
+        """Generates the triples as N-Triples lines."""
+        t = self.triples
+        s = self.string
+        for i in range(self.ntriples):
+            yield "{} {} {} .\n".format(s(t[3*i]), s(t[3*i+1]), s(t[3*i+2]))
+
+    def find(self, text):
+        """Returns the id of the term of N-Triples form `text`,
+        None if the term is not in the snapshot.
+        """
+        key = text.encode("utf-8")
+        lo, hi = 0, self.nstrings
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.nstrings and self.raw(lo) == key:
+            return lo
+        return None
+
+    def first(self, s, p=None):
+        """The index of the first triple with subject `s`
+        (and predicate `p`, if given).
+        """
+        t = self.triples
+        key = (s, -1 if p is None else p)
+        lo, hi = 0, self.ntriples
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (t[3*mid], t[3*mid+1]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def about(self, s):
+        """Generates the (p, o) pairs of the subject `s`."""
+        t = self.triples
+        for i in range(self.first(s), self.ntriples):
+            if t[3*i] != s:
+                return
+            yield t[3*i+1], t[3*i+2]
+
+    def objects(self, s, p):
+        if s is None or p is None:
+            return
+        t = self.triples
+        for i in range(self.first(s, p), self.ntriples):
+            if t[3*i] != s or t[3*i+1] != p:
+                return
+            yield t[3*i+2]
+
+    def module(self, command):
+        return self.find("<{}{}>".format(CUR, command))
+
+    def parameters(self, command):
+        """Returns the parameters of `command` ordered by their sku
+        as dictionaries mapping the property names (e.g. title, type,
+        optionsDefault) to strings, allowed values to lists.
+        None if there is no such command.
+        """
+        m = self.module(command)
+        if m is None:
+            return None
+        params = []
+        for p in self.objects(m, self.find(PARAMETER)):
+            d = {}
+            for k, v in self.about(p):
+                if k == self.type:
+                    continue
+                name = local_name(self.value(k))
+                values = [self.value(i) for i in
+                          self.objects(v, self.identifier)]
+                if values:  # A list of allowed values
+                    d[name] = values
+                else:
+                    d[name] = self.value(v)
+            params.append(d)
+        params.sort(key=lambda d: int(d.get("sku", 0)))
+        return params
+
+    def patterns(self, command):
+        """Returns the list of (type, pattern) output patterns
+        of `command`, None if there is no such command.
+        """
+        m = self.module(command)
+        if m is None:
+            return None
+        string = self.find(PATTERN_STRING)
+        patterns = []
+        for gopr in self.objects(m, self.find(OUTPUT_PATTERN)):
+            for ptr in self.objects(gopr, self.find(PATTERN)):
+                for t in self.objects(ptr, self.identifier):
+                    for s in self.objects(ptr, string):
+                        patterns.append((self.value(t), self.value(s)))
+        patterns.sort()
+        return patterns
@@ -0,0 +1,191 @@
+from rdflib import RDF, Literal
+from rdflib.namespace import DC, DCTERMS
+from icc.ngs.namespace import NGSP, SCHEMA, V, CUR
+from collections import defaultdict
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+# Groups of parameters, the attributes of Command by
+# the CommandParameter arguments.
+GROUPS = {"chooseOnlyOneGroup": "only_one",
+          "chooseAtLeastOneGroup": "at_least_one",
+          "linkedGroup": "linked"}
+GROUPS_BY_PREDICATE = {NGSP[k]: attr for k, attr in GROUPS.items()}
+
+
+class Parameter:
+    """A command parameter as defined by CommandParameter."""
+    __slots__ = ("name", "type", "sku", "options", "default",
+                 "required", "important", "multiple", "output_types",
+                 "only_one", "at_least_one", "linked")
+
+    def __init__(self, name):
+        self.name = name
+        self.type = None
+        self.sku = 0
+        self.options = ()  # Allowed values, any if empty
+        self.default = ""
+        self.required = False
+        self.important = False
+        self.multiple = False
+        self.output_types = ()
+        self.only_one = None  # Group names
+        self.at_least_one = None
+        self.linked = None
+
+    def __repr__(self):
+        return "<Parameter {} {}>".format(self.name, self.type)
+
+
+class Command:
+    """A mothur command with its parameters ordered by sku,
+    `params` maps their names to them. `patterns` maps output
+    types to the output file name patterns. The group attributes
+    map a group name to the names of its parameters.
+    """
+    __slots__ = ("name", "category", "description", "parameters",
+                 "params", "patterns", "only_one", "at_least_one",
+                 "linked")
+
+    def __init__(self, name):
+        self.name = name
+        self.category = None
+        self.description = None
+        self.parameters = []
+        self.params = {}
+        self.patterns = {}
+        self.only_one = {}
+        self.at_least_one = {}
+        self.linked = {}
+
+    def __repr__(self):
+        return "<Command {}>".format(self.name)
+
+
+def value(o):
+    if isinstance(o, Literal):
+        return o.toPython()
+    return o
+
+
+class Spec:
+    """Indexes of the commands of a specification graph, built
+    in one pass over its triples.
+    """
+
+    def __init__(self, graph):
+        self.commands = {}
+        self.categories = defaultdict(list)
+        self.index(graph)
+
+    def index(self, graph):
+        about = defaultdict(list)
+        modules = []
+        for s, p, o in graph:
+            about[s].append((p, o))
+            if p == RDF.type and o == NGSP.Module:
+                modules.append(s)
+        for m in modules:
+            command = self.command_of(m, about)
+            self.commands[command.name] = command
+            self.categories[command.category].append(command)
+        for commands in self.categories.values():
+            commands.sort(key=lambda c: c.name)
+
+    def command_of(self, m, about):
+        props = about[m]
+        command = Command(None)
+        params = []
+        for p, o in props:
+            if p == DC.title:
+                command.name = str(o)
+            elif p == V.category:
+                command.category = str(o)
+            elif p == DCTERMS.description:
+                command.description = str(o)
+            elif p == NGSP.parameter:
+                params.append(self.parameter_of(o, about))
+            elif p == NGSP.outputPattern:
+                for pp, ptr in about[o]:
+                    if pp == NGSP.pattern:
+                        self.pattern_of(command, ptr, about)
+        params.sort(key=lambda p: p.sku)
+        command.parameters = params
+        for param in params:
+            command.params[param.name] = param
+            for attr in GROUPS.values():
+                group = getattr(param, attr)
+                if group:
+                    getattr(command, attr).setdefault(group, []) \
+                                          .append(param.name)
+        return command
+
+    def parameter_of(self, p, about):
+        param = Parameter(None)
+        for k, v in about[p]:
+            if k == DC.title:
+                param.name = str(v)
+            elif k == NGSP.type:
+                param.type = str(v)[len(CUR):]
+            elif k == SCHEMA.sku:
+                param.sku = int(v)
+            elif k == NGSP.options:
+                if not isinstance(v, Literal):  # Only of Multiple type
+                    param.options = tuple(
+                        str(o) for pp, o in about[v] if pp == DC.identifier)
+            elif k == NGSP.optionsDefault:
+                param.default = str(v)
+            elif k == NGSP.required:
+                param.required = value(v)
+            elif k == NGSP.important:
+                param.important = value(v)
+            elif k == NGSP.multipleSelectionAllowed:
+                param.multiple = value(v)
+            elif k == NGSP.outputTypes:
+                param.output_types = tuple(
+                    str(o) for pp, o in about[v] if pp == DC.identifier)
+            elif k in GROUPS_BY_PREDICATE:
+                setattr(param, GROUPS_BY_PREDICATE[k], str(v))
+        return param
+
+    def pattern_of(self, command, ptr, about):
+        t = s = None
+        for p, o in about[ptr]:
+            if p == DC.identifier:
+                t = str(o)
+            elif p == NGSP.patternString:
+                s = str(o)
+        if t is not None and s is not None:
+            command.patterns.setdefault(t, []).append(s)
+
+    def command(self, name):
+        """The Command named `name`, raises KeyError if unknown."""
+        return self.commands[name]
+
+    def parameters(self, name):
+        return self.commands[name].parameters
+
+    def parameter(self, name, param):
+        """The Parameter `param` of command `name`, None if
+        the command has no such parameter.
+        """
+        return self.commands[name].params.get(param)
+
+    def allowed(self, name, param):
+        """The allowed values of parameter `param`, empty if any."""
+        return self.commands[name].params[param].options
+
+    def patterns(self, name, type=None):
+        """The output patterns of command `name` by output type,
+        or the list of patterns of `type`.
+        """
+        patterns = self.commands[name].patterns
+        if type is None:
+            return patterns
+        return patterns.get(type, [])
+
+    def __contains__(self, name):
+        return name in self.commands
+
+    def __len__(self):
+        return len(self.commands)
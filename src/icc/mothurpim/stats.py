@@ -0,0 +1,74 @@
+import contextlib
+import json
+import time
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+
+class Stats:
+    """Collects the timings and counters of a run.
+
+    `timers` accumulate the seconds spent in stages, `counters`
+    the numbers of events (files, bytes, cache hits), `items`
+    the metrics of files, commands and sheds by kind and name.
+    `callback(kind, name, metrics)` is called on every item and
+    finished stage (kind "stage"). The progress messages are
+    printed only if `verbose` is true.
+    """
+
+    def __init__(self, verbose=True, callback=None):
+        self.verbose = verbose
+        self.callback = callback
+        self.timers = {}
+        self.counters = {}
+        self.items = {}
+
+    def log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.add_time(stage, seconds)
+            if self.callback is not None:
+                self.callback("stage", stage, {"seconds": seconds})
+
+    def add_time(self, stage, seconds):
+        self.timers[stage] = self.timers.get(stage, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def item(self, kind, name, **metrics):
+        self.items.setdefault(kind, {}).setdefault(name, {}).update(metrics)
+        if self.callback is not None:
+            self.callback(kind, name, metrics)
+
+    def rate(self, name):
+        """The hit rate of `name` cache, None if it was not used."""
+        hits = self.counters.get(name+".hits", 0)
+        total = hits + self.counters.get(name+".misses", 0)
+        if total == 0:
+            return None
+        return hits / total
+
+    def as_dict(self):
+        rates = {}
+        for counter in self.counters:
+            if counter.endswith(".hits"):
+                name = counter[:-len(".hits")]
+                rates[name] = self.rate(name)
+        return {"timers": self.timers,
+                "counters": self.counters,
+                "rates": rates,
+                "items": self.items}
+
+    def save(self, filename):
+        """Writes the statistics to `filename` as JSON."""
+        with open(filename, "w") as o:
+            json.dump(self.as_dict(), o, indent=2)
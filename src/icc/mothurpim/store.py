@@ -0,0 +1,51 @@
+from rdflib import Graph, URIRef
+from rdflib.plugin import PluginException
+from rdflib.store import VALID_STORE
+import os.path
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+# Persistent rdflib stores. The plugins are optional dependencies:
+# BerkeleyDB needs berkeleydb, Oxigraph needs oxrdflib and
+# SQLAlchemy needs rdflib-sqlalchemy (its path is a database URL).
+# They are the berkeleydb, oxigraph and sqlalchemy extras.
+STORE = "BerkeleyDB"
+STORES = ("BerkeleyDB", "Oxigraph", "SQLAlchemy")
+
+SPEC_GRAPH = URIRef("http://irnok.net/ontologies/mothur/spec")
+SUITE_GRAPH = URIRef("http://irnok.net/ontologies/mothur/suite")
+
+
+def open_store(path, store=STORE, identifier=SPEC_GRAPH, clear=False):
+    """Opens (creating, if necessary) a graph named `identifier`
+    in the persistent rdflib `store` at `path`. If `clear` is
+    true, the previous triples of the graph are removed, so it
+    can be generated anew. Close the graph after use.
+    """
+    try:
+        g = Graph(store=store, identifier=identifier)
+    except (PluginException, ImportError):
+        raise ValueError("{} store is not available, install its plugin "
+                         "or choose another one of {}".format(
+                             store, ", ".join(STORES)))
+    create = True
+    if "://" not in path:
+        # Some stores refuse to create over an existing one
+        create = not os.path.exists(path)
+        if store == "SQLAlchemy":
+            path = "sqlite:///" + os.path.abspath(path)
+    rc = g.open(path, create=create)
+    if rc is not None and rc != VALID_STORE:
+        raise ValueError("cannot open {} store at {}".format(store, path))
+    if clear:
+        g.remove((None, None, None))
+    return g
+
+
+def close_store(g):
+    """Commits the transaction of `g`, if the store
+    supports them, and closes it.
+    """
+    if g.store.transaction_aware:
+        g.commit()
+    g.close()
@@ -1,38 +1,50 @@
 #from mercurial import commands, ui, hg
 import hglib
 import hglib.util
-import pkg_resources
+import hglib.error
+import os
 import os.path
+import re
 import shutil
+import functools
+import multiprocessing
+import time
 from collections import namedtuple
+from concurrent.futures import (ThreadPoolExecutor, ProcessPoolExecutor,
+                                as_completed)
 from lxml import etree
-from rdflib import Graph, Literal, BNode, Namespace, RDF, URIRef, RDFS
+from rdflib import Graph, Literal, Namespace, RDF, URIRef, RDFS
 from rdflib.namespace import DC, DCTERMS, FOAF, XSD
 from icc.ngs.namespace import NGS, NGSP, NGSS, SCHEMA, V, OSLC, CNT, NCO, CUR
+from icc.mothurpim.ntriples import NTriplesWriter
+from icc.mothurpim.store import open_store, close_store, STORE, SUITE_GRAPH
+from icc.mothurpim.stats import Stats
 
 GAL = Namespace("http://galaxyproject.org/ontologies/shed/")
 
 REPOS = "https://toolshed.g2.bx.psu.edu/repos/"
 USER = "iuc"
 SUITE = "suite_mothur"
-HGROOT = os.path.abspath(pkg_resources.resource_filename(
-    "icc.mothurpim", "../../../tmp"))
+# The tmp directory of the source tree
+HGROOT = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                      "..", "..", "..", "tmp"))
 OUTDIR = os.path.abspath(os.path.join(HGROOT, "../output"))
+WORKERS = 8  # Concurrent clones
+CACHEDIR = "rdf-cache"  # Converted sheds, relative to HGROOT
+# Increment when the conversion changes, so the cached sheds are dropped.
+CONVERTER_VERSION = 3
 
-G = Graph()
+STATS = Stats()  # Replaced by main(stats=...)
+SPAWN = multiprocessing.get_context("spawn")
 
 
-def graph_save(filename, format="rdf"):
-    print("# Output filename:{}".format(filename))
-    g = G
-    s = g.serialize(format=format)
-    o = open(filename, "wb")
-    o.write(s)
-    o.close()
+def graph_save(g, filename, format="rdf"):
+    STATS.log("# Output filename:{}".format(filename))
+    # Serialize to the file stream, not to a string
+    g.serialize(destination=filename, format=format, encoding="utf-8")
 
 
-def namespaces():
-    g = G
+def namespaces(g):
     g.bind('oslc', OSLC)
     g.bind('ngs', NGS)
     g.bind('ngsp', NGSP)
@@ -51,26 +63,71 @@ def namespaces():
 DT = DCTERMS
 
 
-def hg_url(name):
-    return REPOS+USER+"/"+name
+def hg_url(name, repos=REPOS):
+    return repos+USER+"/"+name
 
 
-def hg_clone(name):
-    # remove all first
+def shed_iri(shed):
+    """The IRI of the tool of `shed`, its repository URL."""
+    return URIRef("{}/repos/{}/{}".format(shed.shed.rstrip("/"),
+                                          shed.owner, shed.name))
+
+
+def hg_clone(name, repos=REPOS, rev=None):
+    """Brings the checkout of repository `name` from `repos`
+    (which can also be a local directory having USER
+    subdirectory) to revision `rev`, the tip if None.
+
+    A missing or broken checkout is cloned anew, an existing one
+    is left alone if it is already at `rev`, otherwise only the
+    new changesets are pulled into it. Returns True if the
+    checkout has been changed.
+    """
     TARGET = os.path.join(HGROOT, name)
     branch = os.path.join(TARGET, '.hg', 'branch')
-    if not os.path.exists(branch):
-        print("# Clearing dir: {}".format(TARGET))
+    url = hg_url(name, repos)
+    src = hglib.util.b(url)
+    dst = hglib.util.b(TARGET)
+    if rev is not None:
+        rev = hglib.util.b(rev)
+    client = None
+    cloned = False
+    if os.path.exists(branch):
+        try:
+            client = hglib.open(dst)
+        except hglib.error.ServerError:
+            STATS.log("# Broken checkout: {}".format(TARGET))
+    if client is None:
+        # remove all first
+        STATS.log("# Clearing dir: {}".format(TARGET))
         try:
             shutil.rmtree(TARGET)
         except FileNotFoundError:
             pass
-        url = hg_url(name)
-        print("# Cloning {} to {}".format(url, TARGET))
-        src = hglib.util.b(url)
-        dst = hglib.util.b(TARGET)
-        return hglib.clone(src, dst)
-    return None
+        STATS.log("# Cloning {} to {}".format(url, TARGET))
+        client = hglib.clone(src, dst, noupdate=True)
+        cloned = True
+    with client:
+        current = client.identify(id=True).strip()
+        if rev is not None and current.startswith(rev):
+            return False
+        if not cloned and (rev is None or not hg_known(client, rev)):
+            STATS.log("# Pulling {} to {}".format(url, TARGET))
+            client.pull(source=src)
+        if rev is not None and not hg_known(client, rev):
+            raise ValueError("revision {} is not in {}".format(
+                rev.decode(), url))
+        client.update(rev=rev, clean=True)
+        return client.identify(id=True).strip() != current
+
+
+def hg_known(client, rev):
+    """Tells whether the repository of `client` has `rev`."""
+    try:
+        client.log(revrange=rev)
+    except hglib.error.CommandError:
+        return False
+    return True
 
 
 Suite = namedtuple('Suite', ("owner", "name", "shed", "rev"))
@@ -88,7 +145,114 @@ def enumerate_suites(repo):
                         rev=a["changeset_revision"]))
 
 
-INDEX = 0
+def fetch_sheds(sheds, repos=REPOS, workers=WORKERS, cache=None):
+    """Clones or updates the repositories of `sheds` to their
+    pinned revisions concurrently and generates (index, shed)
+    pairs as soon as the checkouts are ready, index is the
+    1-based position in `sheds`. The sheds having converted
+    fragments in `cache` are generated first, without checkouts.
+    The sheds which cannot be cloned or updated are not generated,
+    their checkouts might be at other revisions.
+    """
+    sheds = list(enumerate(sheds, start=1))
+    if cache is not None:
+        cached = [(index, shed) for index, shed in sheds
+                  if os.path.exists(fragment_name(shed, cache))]
+        for index, shed in cached:
+            yield index, shed
+        sheds = [pair for pair in sheds if pair not in cached]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(hg_clone, shed.name, repos, shed.rev):
+                   (index, shed)
+                   for index, shed in sheds}
+        for future in as_completed(futures):
+            index, shed = futures[future]
+            try:
+                future.result()
+            except Exception as e:  # hglib.error.CommandError, OSError
+                STATS.log("#### Cannot clone {}: {}".format(shed.name, e))
+                continue
+            yield index, shed
+
+
+def fragment_name(shed, cache):
+    return os.path.join(cache, "{}-{}-{}.nt".format(
+        shed.name, shed.rev, CONVERTER_VERSION))
+
+
+def load_fragment(shed, cache):
+    """Returns the graph of `shed` converted earlier or None."""
+    filename = fragment_name(shed, cache)
+    if not os.path.exists(filename):
+        return None
+    g = Graph()
+    g.parse(filename, format="nt")
+    return g
+
+
+def save_fragment(shed, g, cache):
+    os.makedirs(cache, exist_ok=True)
+    filename = fragment_name(shed, cache)
+    tmp = filename+".tmp"
+    with NTriplesWriter(tmp) as w:
+        for triple in g:
+            w.add(triple)
+    os.replace(tmp, filename)
+
+
+def prune_fragments(sheds, cache):
+    """Removes the fragments of the sheds which are not
+    in the suite any more or pinned to other revisions.
+    """
+    keep = {os.path.basename(fragment_name(shed, cache)) for shed in sheds}
+    for name in os.listdir(cache):
+        if name.endswith(".nt") and name not in keep:
+            os.remove(os.path.join(cache, name))
+
+
+class Macros:
+    """The definitions of a macros.xml: `xml` macros by name and
+    the tokens, which are expanded by one compiled regexp.
+    """
+
+    def __init__(self, macros):
+        self.xml = {}
+        for xel in macros.xpath("/macros/xml"):
+            self.xml[xel.attrib["name"]] = xel
+        tokens = self.tokens = {}
+        for t in macros.xpath("/macros/token"):
+            tokens[t.attrib['name']] = t.text or ""
+        self.re = None
+        if not tokens:
+            return
+        # Longer names first, if one is a prefix of other.
+        names = sorted(tokens, key=len, reverse=True)
+        self.re = re.compile("|".join(re.escape(k) for k in names))
+        # Tokens can be used in values of other tokens.
+        for _ in range(len(tokens)):
+            expanded = {k: self.expand(v) for k, v in tokens.items()}
+            if expanded == tokens:
+                break
+            tokens.update(expanded)
+
+    def expand(self, t):
+        if t and self.re is not None:
+            return self.re.sub(lambda m: self.tokens[m.group()], t)
+        return t
+
+
+@functools.lru_cache(maxsize=None)
+def parse_macros(data):
+    """Macros of macros.xml content `data`, shared by
+    the sheds having the same macros.xml.
+    """
+    return Macros(etree.ElementTree(etree.fromstring(data)))
+
+
+def load_macros(filename):
+    with open(filename, "rb") as i:
+        return parse_macros(i.read())
+
 
 REPL = {
     GAL['name']: DC['title'],
@@ -106,45 +270,146 @@ def q(URI):
     return REPL.get(URI, URI)
 
 
-def process_shed(shed, root=None):
-    global INDEX
-    INDEX += 1
-    assert(root)
-    hg_clone(shed.name)
+def process_shed(shed, root, index, g, cache=None):
+    """Converts the tool of already cloned `shed` into triples
+    of `g`. `index` is the position
+    of the shed in the suite.
+    The converted triples are kept in and taken from `cache`
+    directory, if it is given.
+    """
+    sg = shed_graph(shed, cache)
+    if sg is not None:
+        link_shed(root, index, sg, g)
+
+
+def shed_graph(shed, cache=None):
+    """Returns the graph of the converted `shed`, taken from
+    `cache` if it is there, None if the tool is not found.
+    """
+    start = time.perf_counter()
+    sg = None
+    if cache is not None:
+        sg = load_fragment(shed, cache)
+    if sg is not None:
+        STATS.log("# Cached: {}".format(fragment_name(shed, cache)))
+        account(shed, sg, start, cache, True)
+        return sg
+    sg = Graph()
+    if convert_shed(shed, sg) is None:
+        sg = None
+    elif cache is not None:
+        save_fragment(shed, sg, cache)
+    account(shed, sg, start, cache, False)
+    return sg
+
+
+def account(shed, sg, start, cache, cached, seconds=None):
+    """Accounts the conversion of `shed` started at `start`
+    (or taken `seconds` in a worker process) in STATS.
+    """
+    if seconds is None:
+        seconds = time.perf_counter() - start
+    if cache is not None:
+        STATS.count("fragments.hits" if cached else "fragments.misses")
+    STATS.add_time("conversion", seconds)
+    STATS.item("shed", shed.name, rev=shed.rev, seconds=seconds,
+               triples=0 if sg is None else len(sg), cached=cached)
+
+
+def link_shed(root, index, sg, g):
+    """Adds the shed graph `sg` to `g` as the `index`-th module
+    of the suite `root`.
+    """
+    m = sg.value(predicate=RDF.type, object=GAL["Module"])
+    g.add((root, NGSP.module, m))
+    g.add((m, SCHEMA.sku, Literal(index)))  # Stock Keeping Unit
+    g.addN((s, p, o, g) for s, p, o in sg)
+
+
+def shed_triples(shed, hgroot, verbose=True):
+    """Converts `shed` in a worker process, returns the list of
+    its triples (None if the tool is not found) and the time
+    it took.
+    """
+    global HGROOT, STATS
+    HGROOT = hgroot
+    STATS = Stats(verbose)
+    start = time.perf_counter()
+    sg = Graph()
+    if convert_shed(shed, sg) is None:
+        return None, time.perf_counter() - start
+    return list(sg), time.perf_counter() - start
+
+
+def convert_sheds(sheds, cache=None, processes=1):
+    """Converts (index, shed) pairs of `sheds` and generates
+    (index, shed, graph) tuples, graph is None if the tool
+    is not found. With `processes` > 1 the sheds are converted
+    by a process pool, each into its own graph, as soon as
+    `sheds` yields them; the tuples then come in completion order.
+    The workers are spawned, not forked, as forked ones would
+    inherit the pipes of the hg command servers of the clones
+    running meanwhile, and these servers would never exit.
+    """
+    if processes <= 1:
+        for index, shed in sheds:
+            yield index, shed, shed_graph(shed, cache)
+        return
+    with ProcessPoolExecutor(processes, SPAWN) as pool:
+        futures = {}
+        for index, shed in sheds:
+            if cache is not None:
+                start = time.perf_counter()
+                sg = load_fragment(shed, cache)
+                if sg is not None:
+                    STATS.log("# Cached: {}".format(
+                        fragment_name(shed, cache)))
+                    account(shed, sg, start, cache, True)
+                    yield index, shed, sg
+                    continue
+            future = pool.submit(shed_triples, shed, HGROOT, STATS.verbose)
+            futures[future] = (index, shed)
+        for future in as_completed(futures):
+            index, shed = futures[future]
+            triples, seconds = future.result()
+            sg = None
+            if triples is not None:
+                sg = Graph()
+                sg.addN((s, p, o, sg) for s, p, o in triples)
+                if cache is not None:
+                    save_fragment(shed, sg, cache)
+            account(shed, sg, None, cache, False, seconds)
+            yield index, shed, sg
+
+
+def elements(element):
+    """The children of `element` without comments and processing
+    instructions, so these do not change the paths of the others.
+    """
+    return [child for child in element if isinstance(child.tag, str)]
+
+
+def convert_shed(shed, g):
+    """Converts the tool of `shed` into triples of `g` and returns
+    the module node, None if the tool is not found.
+    """
     real_name = shed.name.replace("mothur_", "").replace("_", ".")
     HG = os.path.join(HGROOT, shed.name)
     try:
         with open(os.path.join(HG, real_name+'.xml')) as i:
             xml = etree.parse(i)
-            mc = open(os.path.join(HG, 'macros.xml'))
-            macros = etree.parse(mc)
-            print("# ROOT: {}".format(xml))
-            print("# MACROS: {}".format(macros))
+            macros = load_macros(os.path.join(HG, 'macros.xml'))
+            STATS.log("# ROOT: {}".format(xml))
+            STATS.log("# MACROS: {}".format(macros))
     except FileNotFoundError:
-        print("#### Not found: {}".format(real_name))
-        return
-    tk = {}
-    mc = {}
-    for xel in macros.xpath("/macros/xml"):
-        k = xel.attrib["name"]
-        mc[k] = xel
-    for t in macros.xpath("/macros/token"):
-        k = t.attrib['name']
-        tk[k] = t
-    m = BNode()
-    r = root
-    G.add((r, NGSP.module, m))
-    G.add((r, NGSP.module, m))
-    G.add((m, RDF.type, NGSP["Module"]))
-    G.add((m, RDF.type, GAL["Module"]))
-    G.add((m, SCHEMA.sku, Literal(INDEX)))  # Stock Keeping Unit
-    G.add((m, DC.title, Literal(real_name)))
-
-    def macroexp(t):
-        if t:
-            for k, v in tk.items():
-                t = t.replace(k, v.text)
-        return t
+        STATS.log("#### Not found: {}".format(real_name))
+        return None
+    mc = macros.xml
+    macroexp = macros.expand
+    m = shed_iri(shed)
+    g.add((m, RDF.type, NGSP["Module"]))
+    g.add((m, RDF.type, GAL["Module"]))
+    g.add((m, DC.title, Literal(real_name)))
 
     def texttest(t):
         t1 = t
@@ -154,70 +419,166 @@ def process_shed(shed, root=None):
             t1 = macroexp(t1)
         return t1
 
-    def indepth(curr, element, parent=None):
-        if parent is None:
-            parent = curr
+    # Triples are collected in `out` and added in bulk. A child
+    # element is linked to its parent node only when some triple
+    # about the child is made, so the link waits in `pending`.
+    # The node of an element is named by its path in the tool XML
+    # with the macros expanded, so it is the same in every run.
+    out = []
+    pending = {}
+
+    def add(s, p, o):
+        out.append((s, p, o))
+        while s in pending:
+            ps, pp = pending.pop(s)
+            out.append((ps, pp, s))
+            s = ps
+
+    xroot = xml.getroot()
+    STATS.log(">>R>>", xroot.tag)
+    stack = [(m, xroot, m, "")]  # (curr, element, parent, path)
+    while stack:
+        curr, element, parent, path = stack.pop()
         if element.tag in ['macros', 'tests']:  # TODO: Tests might useful
-            return
+            continue
+        if not isinstance(element.tag, str):
+            continue  # Comments and processing instructions
         if element.tag == "expand":
             name = element.attrib["macro"]
-            m = mc[name]
-            for child in m:
+            for i, child in reversed(list(enumerate(elements(mc[name])))):
                 # print(">>>", child.tag)
-                indepth(parent, child, parent=parent)
-            return
+                stack.append((parent, child, parent,
+                              "{}/{}".format(path, i)))
+            continue
         if 'text' in element.attrib and len(element.attrib) == 1 and len(element) == 0:
             t = texttest(element.attrib['text'])
-            G.add((parent, q(GAL[element.tag]), Literal(t)))
-            return
+            add(parent, q(GAL[element.tag]), Literal(t))
+            continue
 
         for ak, av in element.attrib.iteritems():
-            G.add((curr, q(GAL[ak]), Literal(texttest(av))))
+            add(curr, q(GAL[ak]), Literal(texttest(av)))
 
         tt = texttest(element.text)
         if tt:
             if len(element.attrib) == 0 and len(element) == 0:
-                G.add((parent, q(GAL[element.tag]),
-                       Literal(macroexp(element.text))))
-                return
+                add(parent, q(GAL[element.tag]),
+                    Literal(macroexp(element.text)))
+                continue
             else:
-                G.add((curr, DC["description"],
-                       Literal(macroexp(element.text))))
-
-        for child in element:
-            # print("<%s %s %s>" % (curr, child.tag, child.attrib))
-            # print(element.tail)
-            eb = BNode()
-            indepth(eb, child, parent=curr)
-            ll = list(G.predicate_objects(subject=eb))
-            # if child.tag == 'expand':
-            #     print("----", ll)
-            if len(ll) > 0:  # If any relations with eb constructed
-                G.add((curr, q(GAL[child.tag]), eb))
-
-    xroot = xml.getroot()
-    print(">>R>>", xroot.tag)
-    indepth(m, xroot)
-    # for element in xml.iter():
-    #     print(element.text)
-
-
-def main():
-    namespaces()
-    print("# Tmp dir:{}".format(HGROOT))
-    root = hg_clone(SUITE)
-    # client = hglib.open(HGROOT)
-    # print("## {}".format(list(client.manifest())))
-    r = BNode()
-    G.add((r, RDF.type, GAL["Suite"]))
-    G.add((r, DC.title, Literal("Mothur")))
-    for shed in enumerate_suites(root):
-        print("# Toolshed: {} rev {}".format(shed.name, shed.rev))
-        process_shed(shed, root=r)
-        # break
-    graph_save(OUTDIR+"/suite_mothur.ttl", format='n3')
-    graph_save(OUTDIR+"/suite_mothur-ntr.ttl", format='ntriples')
-    # graph_save(OUTDIR+"/suite_mothur.ttl", format='ttl')
+                add(curr, DC["description"],
+                    Literal(macroexp(element.text)))
+
+        for i, child in reversed(list(enumerate(elements(element)))):
+            cpath = "{}/{}{}".format(path, child.tag, i)
+            eb = URIRef(m + "#" + cpath[1:])
+            pending[eb] = (curr, q(GAL[child.tag]))
+            stack.append((eb, child, curr, cpath))
+
+    g.addN((s, p, o, g) for s, p, o in out)
+    return m
+
+
+def main(stream=False, repos=REPOS, workers=WORKERS, cache=True,
+         processes=1, store=None, backend=STORE, stats=None, nquads=False):
+    """Converts the suite. If `stream` is true, only the
+    N-Triples output is written, shed by shed, without
+    collecting the whole suite in memory. With `nquads` the
+    stream is N-Quads of the SUITE_GRAPH in suite_mothur.nq.
+    The shed repositories are cloned from `repos` by `workers`
+    threads, and converted as soon as they are cloned.
+    Converted sheds are cached in `cache` directory (CACHEDIR
+    if True) by their revisions, False disables the cache.
+    With `processes` > 1 the sheds are converted in parallel by
+    that many processes. The sku of a module is the position
+    of its shed in repository_dependencies.xml, so the output
+    does not depend on the order of conversion.
+    If `store` is given, the suite is written to the persistent
+    `backend` store at `store` path instead of the output files,
+    replacing the previous version, and the number of triples
+    is returned. A stream cannot be written to a store.
+    `stats` is a stats.Stats collecting the timings and counters
+    of the run, it also tells whether the progress is printed.
+    """
+    global STATS
+    saved = STATS
+    if stats is not None:
+        STATS = stats
+    try:
+        return convert_suite(stream, repos, workers, cache, processes,
+                             store, backend, nquads)
+    finally:
+        STATS = saved
+
+
+def convert_suite(stream, repos, workers, cache, processes, store, backend,
+                  nquads):
+    """Converts the suite as main does, with the STATS of the run."""
+    if store is not None and stream:
+        raise ValueError("the suite cannot be streamed to a store")
+    if nquads and not stream:
+        raise ValueError("N-Quads are written only by a stream")
+    if store is not None:
+        g = open_store(store, backend, SUITE_GRAPH, clear=True)
+    else:
+        g = Graph()
+    try:
+        namespaces(g)
+        STATS.log("# Tmp dir:{}".format(HGROOT))
+        if cache is True:
+            cache = os.path.join(HGROOT, CACHEDIR)
+        elif cache is False:
+            cache = None
+        root = hg_clone(SUITE, repos)
+        # client = hglib.open(HGROOT)
+        # print("## {}".format(list(client.manifest())))
+        r = URIRef(hg_url(SUITE))
+        suite = list(enumerate_suites(root))
+        sheds = fetch_sheds(suite, repos, workers, cache)
+        converted = convert_sheds(sheds, cache, processes)
+        if nquads:
+            count = stream_suite(converted, r, OUTDIR+"/suite_mothur.nq",
+                                 SUITE_GRAPH)
+        elif stream:
+            count = stream_suite(converted, r,
+                                 OUTDIR+"/suite_mothur-ntr.ttl")
+        else:
+            g.add((r, RDF.type, GAL["Suite"]))
+            g.add((r, DC.title, Literal("Mothur")))
+            for index, shed, sg in converted:
+                STATS.log("# Toolshed: {} rev {}".format(shed.name,
+                                                         shed.rev))
+                if sg is not None:
+                    link_shed(r, index, sg, g)
+        if cache is not None and os.path.isdir(cache):
+            prune_fragments(suite, cache)
+        if stream:
+            return count
+        if store is not None:
+            return len(g)
+        with STATS.timer("serialization"):
+            graph_save(g, OUTDIR+"/suite_mothur.ttl", format='n3')
+            graph_save(g, OUTDIR+"/suite_mothur-ntr.ttl",
+                       format='ntriples')
+        # graph_save(g, OUTDIR+"/suite_mothur.ttl", format='ttl')
+    finally:
+        if store is not None:
+            close_store(g)
+
+
+def stream_suite(converted, r, filename, identifier=None):
+    """Writes the suite `r` of (index, shed, graph) tuples
+    of `converted` to N-Triples `filename`, or to N-Quads
+    of the graph named `identifier`, if it is given.
+    """
+    STATS.log("# Output filename:{}".format(filename))
+    with NTriplesWriter(filename, identifier) as w:
+        w.add((r, RDF.type, GAL["Suite"]))
+        w.add((r, DC.title, Literal("Mothur")))
+        for index, shed, sg in converted:
+            STATS.log("# Toolshed: {} rev {}".format(shed.name, shed.rev))
+            if sg is not None:
+                link_shed(r, index, sg, w)
+    return w.count
 
 
 if __name__ == "__main__":
@@ -0,0 +1,169 @@
+import re
+
+# URL: https://github.com/eugeneai/icc.mothurpim
+
+# Validation of mothur batch scripts against the specification
+# indexed by spec.Spec. The checks of a command are compiled into
+# closures once and kept by the Validator.
+
+RE_COMMAND = re.compile(r"\s*([\w.]+)\s*\((.*)\)\s*(?:#.*)?")
+RE_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+BOOLEANS = {"t", "f", "true", "false"}
+
+
+def parse_command(line):
+    """Splits a batch file line `command(param=value, ...)` into
+    the command name and a dictionary of the arguments.
+    Raises ValueError if the line is malformed.
+    """
+    m = RE_COMMAND.fullmatch(line)
+    if m is None:
+        raise ValueError("not a command: '{}'".format(line.strip()))
+    name, text = m.groups()
+    args = {}
+    if not text.strip():
+        return name, args
+    for arg in text.split(","):
+        param, eq, value = arg.partition("=")
+        param = param.strip()
+        if not eq or not param:
+            raise ValueError("malformed argument '{}'".format(arg.strip()))
+        if param in args:
+            raise ValueError("repeated parameter {}".format(param))
+        args[param] = value.strip()
+    return name, args
+
+
+def value_check(param):
+    """Returns a function checking a value of `param`, which
+    returns an error message or None, or None if any value fits.
+    """
+    name = param.name
+    if param.type == "Number":
+        def check(value):
+            if RE_NUMBER.fullmatch(value) is None:
+                return "{}: '{}' is not a number".format(name, value)
+        return check
+    if param.type == "Boolean":
+        def check(value):
+            if value.lower() not in BOOLEANS:
+                return "{}: '{}' is not T or F".format(name, value)
+        return check
+    if param.type == "Multiple" and param.options:
+        options = frozenset(param.options)
+        multiple = param.multiple
+
+        def check(value):
+            values = value.split("-") if multiple else (value,)
+            for v in values:
+                if v not in options:
+                    return "{}: '{}' is not one of {}".format(
+                        name, v, "-".join(param.options))
+        return check
+    return None
+
+
+def compile_command(command):
+    """Compiles the parameter definitions of a spec.Command
+    into a function checking the arguments dictionary of
+    an invocation, it returns the list of error messages.
+    """
+    name = command.name
+    checks = {p.name: value_check(p) for p in command.parameters}
+    required = [p.name for p in command.parameters
+                if p.required and not p.only_one and not p.at_least_one]
+    only_one = [tuple(names) for names in command.only_one.values()
+                if len(names) > 1]
+    at_least_one = [tuple(names) for names in command.at_least_one.values()]
+    linked = [tuple(names) for names in command.linked.values()
+              if len(names) > 1]
+
+    def check(args):
+        errors = []
+        for param, value in args.items():
+            try:
+                c = checks[param]
+            except KeyError:
+                errors.append("{}: unknown parameter {}".format(name, param))
+                continue
+            if c is not None:
+                e = c(value)
+                if e is not None:
+                    errors.append(e)
+        for param in required:
+            if param not in args:
+                errors.append("{}: {} is required".format(name, param))
+        for names in only_one:
+            given = [n for n in names if n in args]
+            if len(given) > 1:
+                errors.append("{}: only one of {} is allowed".format(
+                    name, ", ".join(given)))
+        for names in at_least_one:
+            if not any(n in args for n in names):
+                errors.append("{}: one of {} is required".format(
+                    name, ", ".join(names)))
+        for names in linked:
+            given = [n for n in names if n in args]
+            if given and len(given) < len(names):
+                errors.append("{}: {} must be given together".format(
+                    name, ", ".join(names)))
+        return errors
+
+    return check
+
+
+class Validator:
+    """Validates mothur command invocations against a spec.Spec."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.checks = {}
+
+    def checker(self, name):
+        """The compiled check of command `name`, None if
+        there is no such command.
+        """
+        try:
+            return self.checks[name]
+        except KeyError:
+            pass
+        check = None
+        if name in self.spec:
+            check = compile_command(self.spec.command(name))
+        self.checks[name] = check
+        return check
+
+    def validate(self, name, args):
+        """Returns the list of errors of the invocation of
+        command `name` with `args` dictionary.
+        """
+        check = self.checker(name)
+        if check is None:
+            return ["unknown command {}".format(name)]
+        return check(args)
+
+    def validate_line(self, line):
+        """Returns the list of errors of a batch file line."""
+        try:
+            name, args = parse_command(line)
+        except ValueError as e:
+            return [str(e)]
+        return self.validate(name, args)
+
+    def validate_lines(self, lines):
+        """Generates (line number, line, errors) for the invalid
+        lines of a batch script, empty and comment lines skipped.
+        """
+        for n, line in enumerate(lines, 1):
+            s = line.strip()
+            if not s or s.startswith("#"):
+                continue
+            errors = self.validate_line(s)
+            if errors:
+                yield n, s, errors
+
+    def validate_file(self, filename):
+        """Validates a batch file, it is read line by line."""
+        with open(filename) as i:
+            for result in self.validate_lines(i):
+                yield result
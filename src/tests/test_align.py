@@ -0,0 +1,47 @@
+from rdflib import Graph, BNode, Literal, RDF
+from rdflib.namespace import DC, OWL
+from icc.mothurpim.align import align, normalize, GAL
+from tests.test_spec import load_spec
+import io
+
+
+def suite():
+    """A Galaxy tool of summary.seqs with a conditional param."""
+    g = Graph()
+    m = BNode()
+    g.add((m, RDF.type, GAL.Module))
+    g.add((m, DC.title, Literal("summary.seqs")))
+    inputs = BNode()
+    g.add((m, GAL.inputs, inputs))
+    for name in ["fasta_in", "savelog"]:
+        p = BNode()
+        g.add((inputs, GAL.param, p))
+        g.add((p, DC.title, Literal(name)))
+    cond = BNode()
+    g.add((inputs, GAL.conditional, cond))
+    p = BNode()
+    g.add((cond, GAL.param, p))
+    g.add((p, DC.title, Literal("count")))
+    other = BNode()
+    g.add((other, RDF.type, GAL.Module))
+    g.add((other, DC.title, Literal("make.biom")))
+    return g
+
+
+class TestAlign:
+    def test_normalize(self):
+        assert normalize("fasta_in") == "fasta"
+        assert normalize("Group.Name") == "groupname"
+
+    def test_align(self):
+        g = Graph()
+        a = align(load_spec(), suite(), g)
+        assert a.commands == 1
+        assert len(g) == 3  # The module, fasta and count
+        assert all(p == OWL.sameAs for s, p, o in g)
+        assert a.missing_commands == ["make.biom"]
+        assert a.params["summary.seqs"] == (
+            ["align", "name", "processors", "summary"], ["savelog"])
+        out = io.StringIO()
+        a.report(out)
+        assert "No mothur command: make.biom" in out.getvalue()
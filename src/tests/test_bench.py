@@ -0,0 +1,20 @@
+from icc.mothurpim.bench import generate_commands, pairs
+from icc.mothurpim.loader import extract
+import contextlib
+import tempfile
+import os
+
+
+class TestBench:
+    def test_generate_commands(self):
+        with tempfile.TemporaryDirectory() as d:
+            generate_commands(d, 3, params=5)
+            ps = pairs(d)
+            assert len(ps) == 3
+            with open(os.devnull, "w") as null:
+                with contextlib.redirect_stdout(null):
+                    records = [extract(cpp, h) for cpp, h in ps]
+        assert [r["name"] for r in records] == \
+            ["cmd0.seqs", "cmd1.seqs", "cmd2.seqs"]
+        assert all(len(r["params"]) == 5 for r in records)
+        assert all(r["patterns"] for r in records)
@@ -0,0 +1,45 @@
+from icc.mothurpim.cache import RecordCache
+import contextlib
+import tempfile
+import os.path
+
+
+@contextlib.contextmanager
+def tempsource():
+    with tempfile.TemporaryDirectory() as d:
+        src = os.path.join(d, "a.cpp")
+        with open(src, "w") as o:
+            o.write("int main() {}\n")
+        yield d, src
+
+
+class TestRecordCache:
+
+    def test_roundtrip(self):
+        with tempsource() as (d, src):
+            c = RecordCache(d, 1)
+            key = c.key(src)
+            assert c.get(key) is None
+            c.put(key, {"name": "a"})
+            c.save()
+            c = RecordCache(d, 1)
+            assert c.get(key) == {"name": "a"}
+            assert c.hits == 1
+
+    def test_version_invalidates(self):
+        with tempsource() as (d, src):
+            c = RecordCache(d, 1)
+            c.put("k", {"name": "a"})
+            c.save()
+            messages = []
+            assert RecordCache(d, 2, messages.append).get("k") is None
+            assert messages == [
+                "# Extractor version changed, cache invalidated"]
+
+    def test_prune(self):
+        with tempsource() as (d, src):
+            c = RecordCache(d, 1)
+            c.put("k1", {})
+            c.put("k2", {})
+            c.prune(["k2"])
+            assert list(c.records) == ["k2"]
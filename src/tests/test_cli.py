@@ -0,0 +1,62 @@
+from icc.mothurpim.cli import main
+from icc.mothurpim.snapshot import write_snapshot
+from tests.test_spec import load_spec
+import contextlib
+import subprocess
+import tempfile
+import io
+import os
+import os.path
+import sys
+
+
+def run(*argv):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        rc = main(list(argv))
+    return rc, out.getvalue()
+
+
+class TestCli:
+    def test_deferred_imports(self):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        out = subprocess.check_output(
+            [sys.executable, "-c", "import sys, icc.mothurpim.cli, "
+             "icc.mothurpim.snapshot; "
+             "print(sorted(m for m in ('rdflib', 'lxml', 'hglib', "
+             "'pkg_resources') if m in sys.modules))"], env=env)
+        assert out.strip() == b"[]"
+
+    def test_show(self):
+        with tempfile.TemporaryDirectory() as d:
+            snapshot = os.path.join(d, "spec.snp")
+            write_snapshot(load_spec(), snapshot)
+            rc, out = run("show", "summary.seqs", "--snapshot", snapshot)
+            assert rc == 0
+            lines = out.splitlines()
+            assert lines[0] == "summary.seqs"
+            assert lines[1].split() == ["fasta", "InputTypes", "required"]
+            assert lines[-1] == "  output summary: [filename],summary"
+            rc, out = run("show", "nothing", "--snapshot", snapshot)
+            assert rc == 1
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as d:
+            rc, out = run("cache", d)
+            assert rc == 1
+            with open(os.path.join(d, "records.json"), "w") as o:
+                o.write('{"version": 2, "records": {"a": {}, "b": {}}}')
+            rc, out = run("cache", d)
+            assert rc == 0 and "2 records of extractor version 2" in out
+
+    def test_stream_store(self):
+        with tempfile.TemporaryDirectory() as d:
+            store = os.path.join(d, "store")
+            try:
+                run("extract", d, "--stream", "-o", os.path.join(d, "s.nt"),
+                    "--store", store)
+            except SystemExit as e:
+                assert e.code == 2
+            else:
+                assert False
+            assert not os.path.exists(store)
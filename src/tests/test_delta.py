@@ -0,0 +1,50 @@
+from icc.mothurpim.delta import delta, graph_lines
+from icc.mothurpim.snapshot import write_snapshot
+from icc.mothurpim.loader import Loader
+from tests.test_spec import SOURCE, command, load_spec, write
+import contextlib
+import tempfile
+import os.path
+
+
+def quiet_delta(d, previous):
+    with open(os.devnull, "w") as null:
+        with contextlib.redirect_stdout(null):
+            return Loader(d).delta(previous)
+
+
+class TestDelta:
+    def test_same(self):
+        g = load_spec()
+        d = delta(lambda: graph_lines(g), graph_lines(load_spec()))
+        assert not d
+        assert d.summary()["added"] == 0
+
+    def test_changes(self):
+        source = SOURCE.replace('"needleman-gotoh", "needleman"',
+                                '"needleman-gotoh-blast", "needleman"')
+        source = "\n".join(line for line in source.splitlines()
+                           if "psummary" not in line)
+        with tempfile.TemporaryDirectory() as d:
+            previous = os.path.join(d, "previous.snp")
+            write_snapshot(load_spec(), previous)
+            write(d, command(source))
+            changes = quiet_delta(d, previous)
+            s = changes.summary()
+            assert s["commands_added"] == s["commands_removed"] == []
+            assert len(s["parameters_removed"]) == 1
+            assert s["parameters_removed"][0].endswith("-summary-parameter")
+            assert any("blast" in line for line in changes.added)
+            assert all("blast" not in line for line in changes.removed)
+
+            update = os.path.join(d, "update.ru")
+            changes.write_sparql(update)
+            with open(update) as i:
+                text = i.read()
+            assert text.startswith("DELETE DATA {")
+            assert "INSERT DATA {" in text
+
+            changes.write_ntriples(os.path.join(d, "summary"))
+            back = delta(os.path.join(d, "summary-removed.nt"),
+                         changes.removed)
+            assert not back
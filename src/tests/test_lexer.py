@@ -0,0 +1,84 @@
+from icc.mothurpim.lexer import (strip_comments, simple_methods,
+                                 command_parts, tokenize, parse_arguments)
+
+HEADER = '''
+/* getCommandName() { return "commented"; } */
+class AlignCheckCommand : public Command {
+    string getCommandName()   { return "align.check"; }
+    string getCitation() { return "http://www.mothur.org/wiki/"
+                                  "Align.check"; } // wiki
+};
+'''
+
+SOURCE = '''
+vector<string> AlignCheckCommand::setParameters(){
+    CommandParameter pfasta("fasta", "InputTypes", "", "", "none", "none",
+        "none", "aligncheck", false, true, true); parameters.push_back(pfasta);
+    // CommandParameter pold("old", "String", "", "", "", "", "", "", false, false);
+    CommandParameter pmap("map", "InputTypes", "", "", "none", "none", "none","",false,true,true); parameters.push_back(pmap);
+}
+string AlignCheckCommand::getHelpString(){
+    string helpString = "";
+    helpString += "Reads a fasta file. // not a comment\\n";
+    helpString += "See http://www.mothur.org/wiki.\\n"; /* } */
+    return helpString;
+}
+string AlignCheckCommand::getOutputPattern(string type) {
+    try {
+        string pattern = "";
+        if (type == "aligncheck") {  pattern = "[filename],align.check"; }
+        else if (type == "fasta") {  pattern = "[filename],[tag],fasta"; }
+        else { m->mothurOut("[ERROR]: " + type + " == \\"x\\"\\n"); }
+        return pattern;
+    }
+    catch(exception& e) {
+        exit(1);
+    }
+}
+'''
+
+
+class TestLexer:
+
+    def test_strip_comments(self):
+        s = 'a = "//x"; // comment\nb = \'/\'; /* c */ c'
+        assert strip_comments(s) == 'a = "//x"; \nb = \'/\';  c'
+
+    def test_tokenize(self):
+        kinds = [k for k, t, start in tokenize('x += "a\\"b"; // c')]
+        assert kinds == ["ident", "op", "string", "op"]
+
+    def test_simple_methods(self):
+        found = simple_methods(HEADER, {"getCommandName", "getCitation"})
+        assert found == {
+            "getCommandName": "align.check",
+            "getCitation": "http://www.mothur.org/wiki/Align.check"}
+
+    def test_command_parts(self):
+        params, helps, gop = command_parts(SOURCE)
+        assert [p[0] for p in params] == ["pfasta", "pmap"]
+        assert params[0][1].startswith('"fasta", "InputTypes"')
+        assert helps == ["", "Reads a fasta file. // not a comment\\n",
+                         "See http://www.mothur.org/wiki.\\n"]
+        text, name, patterns = gop
+        assert text.startswith("getOutputPattern(string type)")
+        assert text.endswith("}\n}")
+        assert name == "type"
+        assert patterns == [("aligncheck", "[filename],align.check"),
+                            ("fasta", "[filename],[tag],fasta")]
+
+    def test_parse_arguments(self):
+        params, helps, gop = command_parts(SOURCE)
+        assert parse_arguments(params[0][1]) == [
+            "fasta", "InputTypes", "", "", "none", "none",
+            "none", "aligncheck", False, True, True]
+        assert parse_arguments(' "a" "b\\n", -1.5, 3 ') == ["ab\n", -1.5, 3]
+        assert parse_arguments("") == []
+
+    def test_parse_arguments_error(self):
+        try:
+            parse_arguments('"fasta", InputTypes, false')
+        except ValueError as e:
+            assert "argument 2" in str(e)
+        else:
+            assert False, "ValueError expected"
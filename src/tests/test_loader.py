@@ -0,0 +1,120 @@
+from icc.mothurpim import loader as loader_module
+from icc.mothurpim.bench import generate_commands
+from icc.mothurpim.cache import status
+from icc.mothurpim.loader import Loader, index_sources
+from icc.mothurpim.stats import Stats
+from tests.test_spec import HEADER, SOURCE, command, write
+import tempfile
+import os
+import os.path
+
+
+def load(sourcedir, **kwargs):
+    return Loader(sourcedir, stats=Stats(verbose=False), **kwargs).load()
+
+
+class TestIndex:
+    def test_headers(self):
+        with tempfile.TemporaryDirectory() as d:
+            write(d, {"a.cpp": "", "a.hpp": "", "a.h": "",
+                      "b.cpp": "", "b.hpp": "",
+                      "c.cpp": "", "c.html": "",
+                      "sub/d.cpp": "", "sub/d.h": ""})
+            index, unmatched = index_sources(d)
+            a, b, c = (os.path.join(d, n) for n in "abc")
+            assert index == {a: (a+".cpp", a+".h"), b: (b+".cpp", b+".hpp")}
+            assert unmatched == [c+".cpp"]
+            index, unmatched = index_sources(d, recursive=True)
+            stem = os.path.join(d, "sub", "d")
+            assert index[stem] == (stem+".cpp", stem+".h")
+
+    def test_unmatched(self):
+        with tempfile.TemporaryDirectory() as d:
+            write(d, command())
+            write(d, command(header=HEADER.replace("summary.seqs", "nested"),
+                             stem="sub/nested"))
+            write(d, {"lonely.cpp": SOURCE})
+            loader = Loader(d, stats=Stats(verbose=False))
+            loader.load()
+            assert loader.unmatched == [os.path.join(d, "lonely.cpp")]
+            assert sorted(loader.stats.items["command"]) == ["summary.seqs"]
+            loader = Loader(d, recursive=True, stats=Stats(verbose=False))
+            loader.load()
+            assert sorted(loader.stats.items["command"]) == \
+                ["nested", "summary.seqs"]
+
+
+class TestParallel:
+    def test_same_graph(self):
+        with tempfile.TemporaryDirectory() as d:
+            generate_commands(d, 40)
+            serial = load(d)
+            assert len(serial) > 1000
+            assert set(load(d, workers=3)) == set(serial)
+
+
+def cached(d, cache):
+    """Loads `d` with the record cache in `cache`, returns the loader."""
+    loader = Loader(d, cache=cache, stats=Stats(verbose=False))
+    loader.load()
+    return loader
+
+
+class TestCache:
+    def test_changed(self):
+        with tempfile.TemporaryDirectory() as d:
+            sources, cache = os.path.join(d, "src"), os.path.join(d, "cache")
+            generate_commands(sources, 5)
+            assert cached(sources, cache).cache.misses == 5
+            with open(os.path.join(sources, "cmd3seqscommand.cpp"), "a") as o:
+                o.write("// Changed\n")
+            loader = cached(sources, cache)
+            assert (loader.cache.hits, loader.cache.misses) == (4, 1)
+            assert set(loader.graph) == set(load(sources))
+            assert status(cache)["records"] == 5
+
+    def test_deleted(self):
+        with tempfile.TemporaryDirectory() as d:
+            sources, cache = os.path.join(d, "src"), os.path.join(d, "cache")
+            generate_commands(sources, 5)
+            cached(sources, cache)
+            for ext in (".h", ".cpp"):
+                os.remove(os.path.join(sources, "cmd3seqscommand" + ext))
+            loader = cached(sources, cache)
+            assert (loader.cache.hits, loader.cache.misses) == (4, 0)
+            assert status(cache)["records"] == 4
+
+    def test_version(self):
+        with tempfile.TemporaryDirectory() as d:
+            sources, cache = os.path.join(d, "src"), os.path.join(d, "cache")
+            generate_commands(sources, 5)
+            cached(sources, cache)
+            version = loader_module.EXTRACTOR_VERSION
+            loader_module.EXTRACTOR_VERSION = version + 1
+            try:
+                loader = cached(sources, cache)
+            finally:
+                loader_module.EXTRACTOR_VERSION = version
+            assert (loader.cache.hits, loader.cache.misses) == (0, 5)
+            s = status(cache)
+            assert (s["version"], s["records"]) == (version + 1, 5)
+
+
+class TestErrors:
+    def test_malformed_parameter(self):
+        source = SOURCE.replace('"",false,false,true); parameters.push_back'
+                                '(pname)', '"",false,false,true,true); '
+                                'parameters.push_back(pname)')
+        line = [n for n, text in enumerate(source.splitlines(), start=1)
+                if "pname(" in text]
+        assert source != SOURCE and len(line) == 1
+        with tempfile.TemporaryDirectory() as d:
+            write(d, command(source))
+            try:
+                load(d)
+            except ValueError as e:
+                assert str(e) == "{}:{}: malformed CommandParameter pname: " \
+                    "too many arguments".format(
+                        os.path.join(d, "summaryseqscommand.cpp"), line[0])
+            else:
+                assert False
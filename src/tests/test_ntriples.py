@@ -0,0 +1,40 @@
+from icc.mothurpim.ntriples import NTriplesWriter
+from rdflib import Dataset, Graph, Literal, BNode, URIRef
+from rdflib.namespace import DC, XSD
+from rdflib.compare import isomorphic
+import io
+
+
+class TestNTriplesWriter:
+
+    def test_roundtrip(self):
+        g = Graph()
+        s = URIRef("http://icc.ru/ontologies/NGS/mothur/align.check")
+        b = BNode()
+        g.add((s, DC.title, Literal('align "check"\nwith \\ slash')))
+        g.add((s, DC.description, Literal("описание", lang="ru")))
+        g.add((s, DC.identifier, Literal(True, datatype=XSD.boolean)))
+        g.add((s, DC.relation, b))
+        g.add((b, DC.identifier, Literal(5)))
+        out = io.StringIO()
+        w = NTriplesWriter(out)
+        for triple in g:
+            w.add(triple)
+        w.close()
+        assert len(w) == 5
+        g2 = Graph()
+        g2.parse(data=out.getvalue(), format="nt")
+        assert isomorphic(g, g2)
+
+    def test_nquads(self):
+        name = URIRef("http://irnok.net/ontologies/mothur/spec")
+        s = URIRef("http://icc.ru/ontologies/NGS/mothur/align.check")
+        out = io.StringIO()
+        with NTriplesWriter(out, name) as w:
+            w.add((s, DC.title, Literal("align.check")))
+            w.add((s, DC.description, Literal("описание", lang="ru")))
+        d = Dataset()
+        d.parse(data=out.getvalue(), format="nquads")
+        assert set(d.graph(name)) == {
+            (s, DC.title, Literal("align.check")),
+            (s, DC.description, Literal("описание", lang="ru"))}
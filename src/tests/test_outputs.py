@@ -0,0 +1,28 @@
+from icc.mothurpim.spec import Spec
+from icc.mothurpim.outputs import Outputs, OutputPattern, root_name
+from tests.test_spec import load_spec
+
+
+class TestOutputs:
+    def test_pattern(self):
+        p = OutputPattern("fasta", "[filename],[tag],fasta-[filename],fasta")
+        assert p.format({"filename": "d/a."}) == "d/a.fasta"
+        assert p.format({"filename": "d/a.", "tag": "pick"}) == \
+            "d/a.pick.fasta"
+        assert p.format({}) is None
+
+    def test_root_name(self):
+        assert root_name("d/a.fasta") == "d/a."
+        assert root_name("a.fastq.gz") == "a."
+        assert root_name("a") == "a."
+
+    def test_predict(self):
+        outputs = Outputs(Spec(load_spec()))
+        assert outputs.predict("summary.seqs", {"fasta": "d/a.fasta"}) == \
+            {"summary": "d/a.summary"}
+        assert outputs.predict("summary.seqs", {"fasta": "d/a.fasta",
+                                                "outputdir": "o"}) == \
+            {"summary": "o/a.summary"}
+        assert outputs.predict_all([("summary.seqs", {})]) == [{}]
+        assert outputs.pattern("summary.seqs", "summary") is \
+            outputs.pattern("summary.seqs", "summary")
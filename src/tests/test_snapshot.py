@@ -0,0 +1,51 @@
+from rdflib import Graph, Literal, BNode, RDF
+from rdflib.namespace import DC
+from icc.ngs.namespace import NGSP, CUR
+from icc.mothurpim import snapshot
+from icc.mothurpim.snapshot import write_snapshot, Snapshot
+import tempfile
+import os.path
+
+
+def spec():
+    g = Graph()
+    m = CUR["align.check"]
+    g.add((m, RDF.type, NGSP.Module))
+    for i, name in enumerate(["fasta", "map"]):
+        p = CUR["align.check-{}-parameter".format(name)]
+        g.add((m, NGSP.parameter, p))
+        g.add((p, RDF.type, NGSP.Parameter))
+        g.add((p, DC.title, Literal(name)))
+        g.add((p, NGSP.sku, Literal(1 - i)))
+    values = BNode()
+    g.add((p, NGSP.options, values))
+    for v in ["a", "b"]:
+        g.add((values, DC.identifier, Literal(v)))
+    gopr = BNode()
+    ptr = BNode()
+    g.add((m, NGSP.outputPattern, gopr))
+    g.add((gopr, NGSP.pattern, ptr))
+    g.add((ptr, DC.identifier, Literal("fasta")))
+    g.add((ptr, NGSP.patternString, Literal('[filename],"x"\n')))
+    return g
+
+
+class TestSnapshot:
+    def test_queries(self):
+        with tempfile.TemporaryDirectory() as d:
+            filename = os.path.join(d, "spec.snap")
+            assert write_snapshot(spec(), filename) == 16
+            with Snapshot(filename) as s:
+                assert len(s) == 16
+                params = s.parameters("align.check")
+                assert [p["title"] for p in params] == ["map", "fasta"]
+                assert sorted(params[0]["options"]) == ["a", "b"]
+                assert s.patterns("align.check") == \
+                    [("fasta", '[filename],"x"\n')]
+                assert s.parameters("nothing") is None
+
+    def test_namespaces(self):
+        assert snapshot.NGSP == str(NGSP)
+        assert snapshot.CUR == str(CUR)
+        assert snapshot.IDENTIFIER == "<{}>".format(DC.identifier)
+        assert snapshot.TYPE == "<{}>".format(RDF.type)
@@ -0,0 +1,123 @@
+from rdflib import BNode
+from icc.mothurpim.cache import status
+from icc.mothurpim.loader import Loader
+from icc.mothurpim.spec import Spec
+from icc.mothurpim.stats import Stats
+import contextlib
+import tempfile
+import os.path
+
+HEADER = '''
+class SummarySeqsCommand : public Command {
+    string getCommandName()     { return "summary.seqs"; }
+    string getCommandCategory() { return "Sequence Processing"; }
+    string getCitation() { return "http://www.mothur.org/wiki/Summary.seqs"; }
+    string getDescription()     { return "summarize the quality of sequences"; }
+};
+'''
+
+SOURCE = '''
+vector<string> SummarySeqsCommand::setParameters(){
+    CommandParameter pfasta("fasta", "InputTypes", "", "", "none", "none", "none","summary",false,true,true); parameters.push_back(pfasta);
+    CommandParameter pname("name", "InputTypes", "", "", "namecount", "none", "none","",false,false,true); parameters.push_back(pname);
+    CommandParameter pcount("count", "InputTypes", "", "", "namecount", "none", "none","",false,false,true); parameters.push_back(pcount);
+    CommandParameter palign("align", "Multiple", "needleman-gotoh", "needleman", "", "", "","",false,false); parameters.push_back(palign);
+    CommandParameter pprocessors("processors", "Number", "", "1", "", "", "","",false,false,true); parameters.push_back(pprocessors);
+    CommandParameter psummary("summary", "Boolean", "", "T", "", "", "","",false,false); parameters.push_back(psummary);
+}
+string SummarySeqsCommand::getOutputPattern(string type) {
+    string pattern = "";
+    if (type == "summary") {  pattern = "[filename],summary"; }
+    return pattern;
+}
+'''
+
+
+def write(d, files):
+    """Writes `files` (a name to text dictionary) to directory `d`."""
+    for name, text in files.items():
+        name = os.path.join(d, name)
+        os.makedirs(os.path.dirname(name), exist_ok=True)
+        with open(name, "w") as o:
+            o.write(text)
+
+
+def command(source=SOURCE, header=HEADER, stem="summaryseqscommand"):
+    """The files of the summary.seqs sample command."""
+    return {stem+".h": header, stem+".cpp": source}
+
+
+def load_spec():
+    """Loads the graph of the summary.seqs sample command."""
+    with tempfile.TemporaryDirectory() as d:
+        write(d, command())
+        with open(os.devnull, "w") as null:
+            with contextlib.redirect_stdout(null):
+                return Loader(d).load()
+
+
+class TestSpec:
+    def test_command(self):
+        spec = Spec(load_spec())
+        assert "summary.seqs" in spec
+        c = spec.command("summary.seqs")
+        assert c.category == "Sequence Processing"
+        assert [p.name for p in c.parameters] == [
+            "fasta", "name", "count", "align", "processors", "summary"]
+        assert c.only_one == {"namecount": ["name", "count"]}
+        assert spec.categories["Sequence Processing"] == [c]
+
+    def test_parameters(self):
+        spec = Spec(load_spec())
+        fasta = spec.parameter("summary.seqs", "fasta")
+        assert fasta.required and fasta.type == "InputTypes"
+        assert fasta.output_types == ("summary",)
+        assert sorted(spec.allowed("summary.seqs", "align")) == \
+            ["gotoh", "needleman"]
+        assert spec.parameter("summary.seqs", "processors").default == "1"
+        assert spec.parameter("summary.seqs", "nothing") is None
+        assert spec.patterns("summary.seqs", "summary") == \
+            ["[filename],summary"]
+
+    def test_stable_iris(self):
+        g = load_spec()
+        assert set(g) == set(load_spec())
+        assert not [t for t in g if any(isinstance(n, BNode) for n in t)]
+
+
+class TestLazy:
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as d:
+            write(d, command())
+            write(d, command(header=HEADER.replace("summary.seqs",
+                                                   "list.seqs"),
+                             stem="listseqscommand"))
+            write(d, {"utility.h": "class Utility {};"})
+            loader = Loader(d, stats=Stats(verbose=False))
+            assert sorted(loader.index()) == ["list.seqs", "summary.seqs"]
+            node = loader.command("summary.seqs")
+            assert loader.command("summary.seqs") == node
+            assert list(loader.stats.items["command"]) == ["summary.seqs"]
+            assert set(loader.graph) <= set(load_spec())
+            assert Spec(loader.graph).command("summary.seqs").category == \
+                "Sequence Processing"
+            loader.load()
+            assert sorted(loader.stats.items["command"]) == \
+                ["list.seqs", "summary.seqs"]
+            assert loader.stats.counters["files"] == 2
+            try:
+                loader.command("nothing")
+            except KeyError:
+                pass
+            else:
+                assert False
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as d:
+            write(d, command())
+            cache = os.path.join(d, "cache")
+            loader = Loader(d, cache=cache, stats=Stats(verbose=False))
+            loader.command("summary.seqs")
+            assert status(cache) is None
+            loader.flush()
+            assert status(cache)["records"] == 1
@@ -0,0 +1,35 @@
+from icc.mothurpim.stats import Stats
+from icc.mothurpim.loader import Loader
+from tests.test_spec import HEADER, SOURCE, command, write
+import contextlib
+import tempfile
+import io
+
+
+class TestStats:
+    def test_stats(self):
+        events = []
+        s = Stats(verbose=False, callback=lambda *e: events.append(e))
+        with s.timer("stage"):
+            s.count("cache.hits", 3)
+            s.count("cache.misses")
+            s.item("file", "a.cpp", bytes=10)
+            s.log("not printed")
+        d = s.as_dict()
+        assert d["rates"] == {"cache": 0.75}
+        assert d["items"] == {"file": {"a.cpp": {"bytes": 10}}}
+        assert [e[0] for e in events] == ["file", "stage"]
+        assert d["timers"]["stage"] >= 0
+
+    def test_quiet_loader(self):
+        stats = Stats(verbose=False)
+        out = io.StringIO()
+        with tempfile.TemporaryDirectory() as d:
+            write(d, command())
+            with contextlib.redirect_stdout(out):
+                g = Loader(d, stats=stats).load()
+        assert out.getvalue() == ""
+        assert stats.counters["files"] == 1
+        assert stats.counters["bytes"] == len(HEADER) + len(SOURCE)
+        assert stats.items["command"]["summary.seqs"]["triples"] == \
+            len(g) - 1  # Without the specification type
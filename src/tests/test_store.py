@@ -0,0 +1,68 @@
+from rdflib import Graph, Literal
+from rdflib.namespace import XSD
+from icc.mothurpim import suite
+from icc.mothurpim.bench import generate_commands
+from icc.mothurpim.loader import Loader
+from icc.mothurpim.stats import Stats
+from icc.mothurpim.store import (open_store, close_store,
+                                 SPEC_GRAPH, SUITE_GRAPH)
+from tests.test_suite import hgroot, local_suite
+from unittest import SkipTest
+import tempfile
+import os.path
+
+try:
+    import oxrdflib
+except ImportError:
+    oxrdflib = None
+
+
+def plain(g):
+    """The triples of `g`, Oxigraph types the plain literals."""
+    triples = set()
+    for s, p, o in g:
+        if isinstance(o, Literal) and o.datatype == XSD.string:
+            o = Literal(str(o))
+        triples.add((s, p, o))
+    return triples
+
+
+def stored(path, identifier):
+    g = open_store(path, "Oxigraph", identifier)
+    try:
+        return plain(g)
+    finally:
+        close_store(g)
+
+
+class TestStore:
+    def setup_method(self):
+        if oxrdflib is None:
+            raise SkipTest("oxrdflib is not installed")
+
+    def test_loader(self):
+        with tempfile.TemporaryDirectory() as d:
+            commands = os.path.join(d, "commands")
+            generate_commands(commands, 5)
+            path = os.path.join(d, "store")
+            g = open_store(path, "Oxigraph", clear=True)
+            Loader(commands, graph=g, stats=Stats(verbose=False)).load()
+            close_store(g)
+            memory = Loader(commands, stats=Stats(verbose=False)).load()
+            assert stored(path, SPEC_GRAPH) == plain(memory)
+
+    def test_suite(self):
+        with tempfile.TemporaryDirectory() as d:
+            repos = local_suite(d, 3)
+            path = os.path.join(d, "store")
+            with hgroot(d):
+                suite.main(repos=repos, workers=2, cache=False,
+                           stats=Stats(verbose=False))
+                count = suite.main(repos=repos, workers=2, cache=False,
+                                   store=path, backend="Oxigraph",
+                                   stats=Stats(verbose=False))
+                memory = Graph().parse(
+                    os.path.join(suite.OUTDIR, "suite_mothur-ntr.ttl"),
+                    format="nt")
+            assert count == len(memory) > 0
+            assert stored(path, SUITE_GRAPH) == plain(memory)
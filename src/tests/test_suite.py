@@ -0,0 +1,365 @@
+from icc.mothurpim import suite
+from icc.mothurpim.bench import generate_sheds, command_name
+from icc.mothurpim.stats import Stats
+from rdflib import Dataset, Graph, Literal
+import contextlib
+import logging
+import re
+import shutil
+import sys
+import tempfile
+import hglib
+import os
+import os.path
+
+SUITE_XML = '''<?xml version="1.0"?>
+<repositories description="Mothur suite">
+{}</repositories>
+'''
+SHED_XML = ('    <repository changeset_revision="{rev}" name="{name}" '
+            'owner="iuc" toolshed="https://toolshed.g2.bx.psu.edu" />\n')
+
+
+def commit(path, files):
+    """Writes `files` (a name to text dictionary) to the hg
+    repository at `path`, creating it, and commits them.
+    Returns the short id of the changeset.
+    """
+    if not os.path.exists(os.path.join(path, ".hg")):
+        os.makedirs(path, exist_ok=True)
+        hglib.init(hglib.util.b(path)).close()
+    for name, text in files.items():
+        with open(os.path.join(path, name), "w") as o:
+            o.write(text)
+    with hglib.open(hglib.util.b(path)) as client:
+        rev, node = client.commit(message=b"change", addremove=True,
+                                  user=b"test")
+    return node[:12].decode()
+
+
+@contextlib.contextmanager
+def hgroot(d):
+    """Makes `d`/hg the HGROOT and `d`/out the OUTDIR of suite."""
+    saved = suite.HGROOT, suite.OUTDIR
+    suite.HGROOT = os.path.join(d, "hg")
+    suite.OUTDIR = os.path.join(d, "out")
+    os.makedirs(suite.OUTDIR)
+    try:
+        yield
+    finally:
+        suite.HGROOT, suite.OUTDIR = saved
+
+
+def checkout(name):
+    with hglib.open(hglib.util.b(os.path.join(suite.HGROOT, name))) as c:
+        return c.identify(id=True).strip().decode()
+
+
+def local_suite(d, count):
+    """Commits a suite of `count` generated sheds to hg
+    repositories under `d`, returns their URL prefix.
+    """
+    repos = os.path.join(d, "repos") + "/"
+    owner = os.path.join(repos, suite.USER)
+    sheds = generate_sheds(owner, count)
+    pins = "".join(SHED_XML.format(
+        rev=commit(os.path.join(owner, shed.name), {}), name=shed.name)
+                   for shed in sheds)
+    commit(os.path.join(owner, suite.SUITE),
+           {"repository_dependencies.xml": SUITE_XML.format(pins)})
+    return repos
+
+
+def repin(repos, name, rev):
+    """Pins shed `name` of the local suite at `repos` to `rev`."""
+    path = os.path.join(repos, suite.USER, suite.SUITE)
+    with open(os.path.join(path, "repository_dependencies.xml")) as i:
+        text = i.read()
+    text = re.sub(r'changeset_revision="\w+" name="{}"'.format(name),
+                  'changeset_revision="{}" name="{}"'.format(rev, name), text)
+    commit(path, {"repository_dependencies.xml": text})
+
+
+def output():
+    return Graph().parse(os.path.join(suite.OUTDIR, "suite_mothur-ntr.ttl"),
+                         format="nt")
+
+
+def shed_name(i):
+    return "mothur_" + command_name(i).replace(".", "_")
+
+
+class TestHgClone:
+    def test_pinned_revision(self):
+        with tempfile.TemporaryDirectory() as d:
+            repos = os.path.join(d, "repos") + "/"
+            upstream = os.path.join(repos, suite.USER, "tool")
+            first = commit(upstream, {"a.txt": "1"})
+            with hgroot(d):
+                assert suite.hg_clone("tool", repos, first)
+                assert checkout("tool") == first
+                # Already there, nothing is pulled
+                assert not suite.hg_clone("tool", repos, first)
+
+                second = commit(upstream, {"a.txt": "2"})
+                commit(upstream, {"a.txt": "3"})  # The tip
+                assert suite.hg_clone("tool", repos, second)
+                assert checkout("tool") == second
+
+                try:
+                    suite.hg_clone("tool", repos, "0123456789ab")
+                except ValueError:
+                    pass
+                else:
+                    assert False
+                assert checkout("tool") == second
+
+
+def macros(*tokens):
+    return suite.parse_macros("<macros>{}</macros>".format("".join(
+        '<token name="{}">{}</token>'.format(name, value)
+        for name, value in tokens)).encode())
+
+
+class TestMacros:
+    def test_nested(self):
+        m = macros(("@A@", "a @B@"), ("@B@", "b @C@"), ("@C@", "c"))
+        assert m.expand("@A@.") == "a b c."
+
+    def test_empty(self):
+        m = macros(("@E@", ""), ("@V@", "1"))
+        assert m.tokens["@E@"] == ""
+        assert m.expand("x@E@y @V@") == "xy 1"
+
+    def test_prefix(self):
+        m = macros(("@T", "short"), ("@TOKEN@", "long"))
+        assert m.expand("@TOKEN@ @T") == "long short"
+
+    def test_shared(self):
+        with tempfile.TemporaryDirectory() as d:
+            names = [os.path.join(d, shed.name, "macros.xml")
+                     for shed in generate_sheds(d, 3)]
+            shutil.copy(names[0], names[1])
+            first, second, third = map(suite.load_macros, names)
+            assert first is second
+            assert third is not first
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+TOOL_XML = """<tool id="mothur_deep_seqs" name="deep.seqs">
+    <macros><import>macros.xml</import></macros>
+    <inputs>{}</inputs>
+</tool>
+"""
+
+
+def convert_tool(d, inputs, macros="<macros/>"):
+    """Converts a deep.seqs shed of tool `inputs` and `macros`
+    (XML texts) in directory `d`, returns the graph.
+    """
+    shed = suite.Suite(owner=suite.USER, name="mothur_deep_seqs",
+                       shed="toolshed.g2.bx.psu.edu", rev="0")
+    with hgroot(d):
+        path = os.path.join(suite.HGROOT, shed.name)
+        os.makedirs(path)
+        with open(os.path.join(path, "deep.seqs.xml"), "w") as o:
+            o.write(TOOL_XML.format(inputs))
+        with open(os.path.join(path, "macros.xml"), "w") as o:
+            o.write(macros)
+        stats, suite.STATS = suite.STATS, Stats(verbose=False)
+        try:
+            g = Graph()
+            suite.convert_shed(shed, g)
+        finally:
+            suite.STATS = stats
+    return g
+
+
+class TestConvert:
+    def test_deep(self):
+        # Each macro nests a section, the parser itself stops at
+        # 256 levels in one document. The root of an expanded macro
+        # is merged into the node of the expand, its children are not.
+        depth = sys.getrecursionlimit() + 100
+        macros = "".join(
+            '<xml name="m{}"><macro><section name="s{}">'
+            '<expand macro="m{}"/></section></macro></xml>'.format(
+                i, i, i + 1)
+            for i in range(depth))
+        macros += ('<xml name="m{}"><macro><param name="deep"/></macro>'
+                   '</xml>'.format(depth))
+        with tempfile.TemporaryDirectory() as d:
+            g = convert_tool(d, '<expand macro="m0"/>',
+                             "<macros>{}</macros>".format(macros))
+        sections = list(g.subject_objects(suite.GAL.section))
+        assert len(sections) == depth
+        node, = g.subjects(suite.DC.title, Literal("deep"))
+        length = 0
+        while (node, suite.RDF.type, suite.GAL.Module) not in g:
+            node, = g.subjects(None, node)
+            length += 1
+        assert length == depth + 2  # The param, sections and inputs
+
+    def test_empty(self):
+        with tempfile.TemporaryDirectory() as d:
+            g = convert_tool(d, '<param name="a"/><conditional/>'
+                             '<section><when/></section>')
+        assert (None, suite.GAL.param, None) in g
+        for tag in ("conditional", "section", "when"):
+            assert not [t for t in g if any(tag in n for n in t)]
+
+    def test_comments(self):
+        with tempfile.TemporaryDirectory() as d:
+            with hgroot(d):
+                shed, = generate_sheds(suite.HGROOT, 1)
+                tool = os.path.join(suite.HGROOT, shed.name,
+                                    command_name(0) + ".xml")
+                with open(tool) as i:
+                    text = i.read()
+                with open(tool, "w") as o:
+                    o.write(text.replace("<inputs>",
+                                         "<inputs>\n<!-- A comment -->"))
+                records = Records()
+                logger = logging.getLogger("rdflib")
+                logger.addHandler(records)
+                stats, suite.STATS = suite.STATS, Stats(verbose=False)
+                try:
+                    (index, s, g), = suite.convert_sheds([(1, shed)])
+                    with open(tool, "w") as o:
+                        o.write(text)
+                    (index, s, plain), = suite.convert_sheds([(1, shed)])
+                finally:
+                    suite.STATS = stats
+                    logger.removeHandler(records)
+            assert len(g) > 0
+            # The comment does not rename the following elements
+            assert set(g) == set(plain)
+            assert records.messages == []
+            assert not [t for t in g if any("Comment" in n for n in t)]
+
+
+class TestMain:
+    def test_stats(self):
+        with tempfile.TemporaryDirectory() as d:
+            repos = local_suite(d, 1)
+            before = suite.STATS
+            stats = Stats(verbose=False)
+            with hgroot(d):
+                suite.main(repos=repos, workers=1, cache=False, stats=stats)
+            assert suite.STATS is before
+            assert "serialization" in stats.timers
+
+    def test_processes(self):
+        with tempfile.TemporaryDirectory() as d:
+            repos = local_suite(d, 4)
+            with hgroot(d):
+                suite.main(repos=repos, workers=2, cache=False,
+                           stats=Stats(verbose=False))
+                serial = output()
+                suite.main(repos=repos, workers=2, cache=False,
+                           processes=2, stats=Stats(verbose=False))
+                parallel = output()
+            assert len(serial) > 0
+            assert set(parallel) == set(serial)
+
+    def test_nquads(self):
+        with tempfile.TemporaryDirectory() as d:
+            repos = local_suite(d, 2)
+            with hgroot(d):
+                suite.main(repos=repos, workers=1, cache=False,
+                           stats=Stats(verbose=False))
+                triples = set(output())
+                count = suite.main(stream=True, repos=repos, workers=1,
+                                   cache=False, nquads=True,
+                                   stats=Stats(verbose=False))
+                quads = Dataset().parse(
+                    os.path.join(suite.OUTDIR, "suite_mothur.nq"),
+                    format="nquads")
+            assert count == len(triples)
+            assert set(quads.graph(suite.SUITE_GRAPH)) == triples
+
+    def test_stream_store(self):
+        with tempfile.TemporaryDirectory() as d:
+            store = os.path.join(d, "store")
+            with hgroot(d):
+                try:
+                    suite.main(stream=True, repos=local_suite(d, 1),
+                               store=store, stats=Stats(verbose=False))
+                except ValueError:
+                    pass
+                else:
+                    assert False
+            assert not os.path.exists(store)
+
+    def test_unknown_revision(self):
+        with tempfile.TemporaryDirectory() as d:
+            repos = local_suite(d, 2)
+            with hgroot(d):
+                suite.main(repos=repos, workers=1, cache=False,
+                           stats=Stats(verbose=False))
+                assert len(list(output().objects(None, suite.SCHEMA.sku))) \
+                    == 2
+                repin(repos, shed_name(0), "0123456789ab")
+                suite.main(repos=repos, workers=1, cache=False,
+                           stats=Stats(verbose=False))
+                skus = set(output().objects(None, suite.SCHEMA.sku))
+            # The old checkout of the first shed is not converted
+            assert {s.toPython() for s in skus} == {2}
+
+
+class TestFragments:
+    def test_reuse(self):
+        with tempfile.TemporaryDirectory() as d:
+            repos = local_suite(d, 2)
+            cache = os.path.join(d, "cache")
+            with hgroot(d):
+                suite.main(repos=repos, workers=1, cache=cache,
+                           stats=Stats(verbose=False))
+                first = output()
+                stats = Stats(verbose=False)
+                suite.main(repos=repos, workers=1, cache=cache, stats=stats)
+                assert set(output()) == set(first)
+            assert stats.counters == {"fragments.hits": 2}
+
+    def test_repin(self):
+        with tempfile.TemporaryDirectory() as d:
+            repos = local_suite(d, 2)
+            cache = os.path.join(d, "cache")
+            name = shed_name(0)
+            with hgroot(d):
+                suite.main(repos=repos, workers=1, cache=cache,
+                           stats=Stats(verbose=False))
+                old = sorted(os.listdir(cache))
+                rev = commit(os.path.join(repos, suite.USER, name),
+                             {"a.txt": "1"})
+                repin(repos, name, rev)
+                suite.main(repos=repos, workers=1, cache=cache,
+                           stats=Stats(verbose=False))
+                new = sorted(os.listdir(cache))
+                assert checkout(name) == rev
+            assert len(old) == len(new) == 2
+            assert old[1] == new[1]
+            assert old[0] != new[0] and new[0].startswith(name + "-" + rev)
+
+    def test_unknown_revision(self):
+        with tempfile.TemporaryDirectory() as d:
+            repos = local_suite(d, 2)
+            cache = os.path.join(d, "cache")
+            with hgroot(d):
+                suite.main(repos=repos, workers=1, cache=cache,
+                           stats=Stats(verbose=False))
+                repin(repos, shed_name(0), "0123456789ab")
+                suite.main(repos=repos, workers=1, cache=cache,
+                           stats=Stats(verbose=False))
+            # Neither the old checkout is saved as the new revision
+            # nor the fragment of the old revision is kept
+            assert [name.split("-")[0] for name in os.listdir(cache)] \
+                == [shed_name(1)]
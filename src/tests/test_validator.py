@@ -0,0 +1,46 @@
+from icc.mothurpim.spec import Spec
+from icc.mothurpim.validator import Validator, parse_command
+from tests.test_spec import load_spec
+
+BATCH = '''# A pipeline
+summary.seqs(fasta=a.fasta, processors=8)
+
+summary.seqs(fasta=a.fasta, name=a.names, count=a.count_table)
+summary.seqs(fasta=a.fasta, align=blast, summary=maybe)
+summary.seqs(processors=x)
+unknown.seqs()
+summary.seqs(fasta=a.fasta
+'''
+
+
+def validator():
+    return Validator(Spec(load_spec()))
+
+
+class TestValidator:
+    def test_parse_command(self):
+        assert parse_command("summary.seqs(fasta=a.fasta, processors=2)") \
+            == ("summary.seqs", {"fasta": "a.fasta", "processors": "2"})
+        assert parse_command("quit()") == ("quit", {})
+        try:
+            parse_command("summary.seqs(fasta)")
+        except ValueError as e:
+            assert "fasta" in str(e)
+        else:
+            assert False, "ValueError expected"
+
+    def test_validate(self):
+        v = validator()
+        assert v.validate("summary.seqs", {"fasta": "a", "align": "gotoh"}) \
+            == []
+        assert v.validate("summary.seqs", {"fasta": "a", "x": "1"}) == \
+            ["summary.seqs: unknown parameter x"]
+
+    def test_validate_lines(self):
+        results = list(validator().validate_lines(BATCH.splitlines()))
+        assert [n for n, line, errors in results] == [4, 5, 6, 7, 8]
+        assert results[0][2] == [
+            "summary.seqs: only one of name, count is allowed"]
+        assert len(results[1][2]) == 2
+        assert len(results[2][2]) == 2  # Not a number, no fasta
+        assert results[3][2] == ["unknown command unknown.seqs"]